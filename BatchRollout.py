@@ -0,0 +1,95 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from Solution import Solution
+
+
+# The most memory the visited maps of the walks solved together may take. Larger populations are solved in
+# chunks of walks that stay below it.
+VISITED_BYTES_LIMIT = 256 * 1024 * 1024
+
+
+def batch_solve(solutions: List[Solution], rng: np.random.Generator) -> None:
+    """Moves every solution that can still move until it reaches the end or gets stuck, all at once.
+
+    This is the population-wide counterpart of `Solution.solve`: each step advances all unfinished walks
+    together, picking uniformly among the valid directions of every walk, so the resulting paths follow
+    the same distribution as solving each solution on its own. Every walk keeps a bit-packed visited map
+    of the whole labyrinth, which costs one bit per cell and walk, so only as many walks as fit in
+    VISITED_BYTES_LIMIT are moved together.
+
+    Args:
+    - solutions (List[Solution]): The solutions to move. Solutions that cannot move are left untouched.
+    - rng (np.random.Generator): The random number generator used to choose directions.
+    """
+    walkers = [s for s in solutions if s.can_move]
+    if not walkers:
+        return
+    context = walkers[0].context
+    height, width = context.grid.shape
+    passable = context.grid.ravel()
+    chunk = max(1, VISITED_BYTES_LIMIT // ((height * width + 7) // 8))
+    for first in range(0, len(walkers), chunk):
+        _solve_walkers(walkers[first:first + chunk], passable, width, context.end, rng)
+
+
+def _solve_walkers(walkers: List[Solution], passable: np.ndarray, width: int, end: Tuple[int, int],
+                   rng: np.random.Generator) -> None:
+    cells = len(passable)
+    goal = end[0] * width + end[1]
+    count = len(walkers)
+
+    # Mark the paths the walks already have as visited.
+    paths = [s.path for s in walkers]
+    lengths = np.array([len(path) for path in paths])
+    prefix = np.array([cell for path in paths for cell in path], dtype=np.int64).reshape(-1, 2)
+    prefix = prefix[:, 0] * width + prefix[:, 1]
+    owners = np.repeat(np.arange(count), lengths)
+    visited = np.zeros((count, (cells + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(visited, (owners, prefix >> 3), (1 << (prefix & 7)).astype(np.uint8))
+    positions = prefix[np.cumsum(lengths) - 1]
+
+    offsets = np.array([1, width, -1, -width])
+    reached = np.zeros(count, dtype=bool)
+    active = np.arange(count)
+    moved_owners, moved_cells = [], []
+    while active.size:
+        current = positions[active]
+        column = current % width
+        inside = np.stack([column + 1 < width, current + width < cells, column > 0, current >= width], axis=1)
+        candidates = np.where(inside, current[:, None] + offsets, current[:, None])
+        unvisited = (visited[active[:, None], candidates >> 3] >> (candidates & 7)) & 1 == 0
+        valid = inside & passable[candidates] & unvisited
+
+        # A uniformly random valid direction is the one with the highest random key among the valid ones.
+        keys = rng.random(valid.shape)
+        keys[~valid] = -1
+        choice = keys.argmax(axis=1)
+        can_move = valid.any(axis=1)
+
+        active = active[can_move]
+        new_cells = candidates[can_move, choice[can_move]]
+        positions[active] = new_cells
+        visited[active, new_cells >> 3] |= (1 << (new_cells & 7)).astype(np.uint8)
+        moved_owners.append(active)
+        moved_cells.append(new_cells)
+
+        at_goal = new_cells == goal
+        reached[active[at_goal]] = True
+        active = active[~at_goal]
+
+    # Append the steps of every walk to its path, in the order they were taken.
+    if moved_owners:
+        moved_owners = np.concatenate(moved_owners)
+        moved_cells = np.concatenate(moved_cells)[np.argsort(moved_owners, kind="stable")]
+        step_counts = np.bincount(moved_owners, minlength=count)
+        rows, columns = np.divmod(moved_cells, width)
+        rows, columns = rows.tolist(), columns.tolist()
+        start = 0
+        for walker, steps in zip(walkers, step_counts.tolist()):
+            walker.extend(list(zip(rows[start:start + steps], columns[start:start + steps])))
+            start += steps
+    for walker, has_reached_end in zip(walkers, reached.tolist()):
+        walker.can_move = False
+        walker.has_reached_end = walker.has_reached_end or has_reached_end
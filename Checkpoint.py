@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from GALabyrinthSolver import GALabyrinthSolver
+from GenerationStats import GenerationStats
+from PackedGrid import PackedGrid
+from PathStore import ROOT
+from Solution import Solution
+
+# A checkpoint holds the whole state of a GALabyrinthSolver between two generations. It starts with a fixed
+# header, followed by a small JSON object with the scalar state, followed by little-endian arrays:
+#
+#   random_state  uint32[625]  the state of the random module
+#   node_parents  int32[n]     the prefix tree of all paths, parents before children, -1 for the roots
+#   node_cells    uint32[n]    the cell of every node as y * width + x
+#   nodes         int32[P]     the node every solution's path ends in
+#   fitness       float64[P]   the fitness score of every solution
+#   flags         uint8[P]     can_move, has_reached_end and dirty as bits 0, 1 and 2
+#
+# Paths are stored as the tree the PathStore already shares them in, so common prefixes are written once.
+# The labyrinth itself is not stored, only its hash, and must be passed in again on resume.
+
+CHECKPOINT_MAGIC = b"GACK"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_HEADER = struct.Struct("<4sH32sI")
+CAN_MOVE, HAS_REACHED_END, DIRTY = 1, 2, 4
+
+
+def maze_hash(grid) -> bytes:
+    """Returns the SHA-256 digest of a passability grid, the same for every copy of the same labyrinth.
+
+    Args:
+    - grid: The passability grid, as an array or a PackedGrid.
+
+    Returns:
+    - bytes: The 32 byte digest.
+    """
+    bits = grid.bits if isinstance(grid, PackedGrid) else PackedGrid.pack(grid)
+    digest = hashlib.sha256()
+    digest.update(np.array(grid.shape, dtype="<i8").tobytes())
+    digest.update(np.ascontiguousarray(bits).tobytes())
+    return digest.digest()
+
+
+def encode_checkpoint(solver: GALabyrinthSolver) -> bytes:
+    """Captures the state of a solver between two generations.
+
+    Args:
+    - solver (GALabyrinthSolver): The solver. It must not be evolving a generation at the same time.
+
+    Returns:
+    - bytes: The checkpoint.
+    """
+    store, width = solver.path_store, solver.labyrinth.width
+    # Collect the nodes the population uses, each once, and order them parents first.
+    used = set()
+    for individual in solver.population:
+        node = individual.node
+        while node != ROOT and node not in used:
+            used.add(node)
+            node = store.parents[node]
+    order = sorted(used, key=store.depth)
+    position = {node: index for index, node in enumerate(order)}
+    position[ROOT] = -1
+    node_parents = np.fromiter((position[store.parents[node]] for node in order), dtype="<i4", count=len(order))
+    node_cells = np.fromiter((store.cells[node][0] * width + store.cells[node][1] for node in order),
+                             dtype="<u4", count=len(order))
+    population = solver.population
+    nodes = np.fromiter((position[individual.node] for individual in population), dtype="<i4",
+                        count=len(population))
+    fitness = np.fromiter((individual.fitness_score for individual in population), dtype="<f8",
+                          count=len(population))
+    flags = np.fromiter((individual.can_move * CAN_MOVE | individual.has_reached_end * HAS_REACHED_END
+                         | individual.dirty * DIRTY for individual in population), dtype=np.uint8,
+                        count=len(population))
+
+    random_version, random_internal, gauss = random.getstate()
+    meta = {"generation": solver.generation, "current_generation": solver.current_generation,
+            "population_size": solver.population_size, "mutation_rate": solver.mutation_rate,
+            "elitism_rate": solver.ELITISM_RATE, "previous_best_fitness": solver.previous_best_fitness,
+            "no_improvement_streak": solver.no_improvement_streak, "found_solution": solver.found_solution,
+            "init": list(solver.init), "end": list(solver.end), "rollout_backend": solver.rollout_backend,
+            "selection": solver.selection, "evaluation_count": solver.evaluation_count,
+            "skipped_evaluation_count": solver.skipped_evaluation_count,
+            "evaluator_seed": solver.evaluator.seed if solver.evaluator is not None else None,
+            "random_version": random_version, "gauss": gauss, "rng": solver.rng.bit_generator.state,
+            "nodes": len(order)}
+    meta_bytes = json.dumps(meta).encode()
+    header = CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, maze_hash(solver.labyrinth.get_labyrinth()),
+                                    len(meta_bytes))
+    return b"".join((header, meta_bytes, np.array(random_internal, dtype="<u4").tobytes(), node_parents.tobytes(),
+                     node_cells.tobytes(), nodes.tobytes(), fitness.tobytes(), flags.tobytes()))
+
+
+def write_checkpoint(data: bytes, path: str) -> None:
+    """Writes a checkpoint so that the file at path is always either the old or the new checkpoint.
+
+    Args:
+    - data (bytes): The checkpoint from `encode_checkpoint`.
+    - path (str): The file to write.
+    """
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary_path, "wb") as checkpoint_file:
+        checkpoint_file.write(data)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def save_checkpoint(solver: GALabyrinthSolver, path: str) -> None:
+    """Writes the state of a solver to a checkpoint file, waiting until it is written.
+
+    Args:
+    - solver (GALabyrinthSolver): The solver.
+    - path (str): The file to write.
+    """
+    write_checkpoint(encode_checkpoint(solver), path)
+
+
+def resume(path: str, labyrinth, workers: Optional[int] = None) -> GALabyrinthSolver:
+    """Rebuilds a solver from a checkpoint file. It continues exactly as the checkpointed solver would have.
+
+    The random module is reset to its state at the time of the checkpoint, like everything else.
+
+    Args:
+    - path (str): The checkpoint file.
+    - labyrinth: The labyrinth the checkpointed solver was solving.
+    - workers (Optional[int]): The number of worker processes, as for the GALabyrinthSolver constructor.
+
+    Returns:
+    - GALabyrinthSolver: The solver, between the same two generations as when the checkpoint was taken.
+
+    Raises:
+    - ValueError: If the file is not a checkpoint or was taken on a different labyrinth.
+    """
+    with open(path, "rb") as checkpoint_file:
+        data = checkpoint_file.read()
+    magic, version, digest, meta_length = CHECKPOINT_HEADER.unpack_from(data)
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is not a checkpoint this version can read")
+    if digest != maze_hash(labyrinth.get_labyrinth()):
+        raise ValueError(f"{path} was taken on a different labyrinth")
+    offset = CHECKPOINT_HEADER.size
+    meta: Dict = json.loads(data[offset:offset + meta_length])
+    offset += meta_length
+    arrays: List[np.ndarray] = []
+    for dtype, count in (("<u4", 625), ("<i4", meta["nodes"]), ("<u4", meta["nodes"]),
+                         ("<i4", meta["population_size"]), ("<f8", meta["population_size"]),
+                         (np.uint8, meta["population_size"])):
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        arrays.append(array)
+        offset += array.nbytes
+    random_internal, node_parents, node_cells, nodes, fitness, flags = arrays
+
+    solver = GALabyrinthSolver.__new__(GALabyrinthSolver)
+    init, end = tuple(meta["init"]), tuple(meta["end"])
+    solver._setup(meta["generation"], meta["population_size"], meta["mutation_rate"], init, end, labyrinth,
+                  meta["rollout_backend"], workers, meta["selection"], evaluator_seed=meta["evaluator_seed"])
+    solver.current_generation = meta["current_generation"]
+    solver.ELITISM_RATE = meta["elitism_rate"]
+    solver.previous_best_fitness = meta["previous_best_fitness"]
+    solver.no_improvement_streak = meta["no_improvement_streak"]
+    solver.found_solution = meta["found_solution"]
+    solver.evaluation_count = meta["evaluation_count"]
+    solver.skipped_evaluation_count = meta["skipped_evaluation_count"]
+
+    # Rebuild the prefix tree, holding one handle on every node until the solutions hold their own.
+    store, width = solver.path_store, labyrinth.width
+    rows, columns = np.divmod(node_cells, width)
+    handles: List[int] = []
+    for parent, y, x in zip(node_parents.tolist(), rows.tolist(), columns.tolist()):
+        handles.append(store.add(ROOT if parent < 0 else handles[parent], (y, x)))
+    population = []
+    for node, fitness_score, flag in zip(nodes.tolist(), fitness.tolist(), flags.tolist()):
+        individual = Solution(solver.context)
+        store.retain(handles[node])
+        store.release(individual.node)
+        individual.node = handles[node]
+        individual.fitness_score = fitness_score
+        individual.can_move = bool(flag & CAN_MOVE)
+        individual.has_reached_end = bool(flag & HAS_REACHED_END)
+        individual.dirty = bool(flag & DIRTY)
+        population.append(individual)
+    for handle in handles:
+        store.release(handle)
+    solver.population = population
+    solver.stats = GenerationStats.from_population(solver)
+    solver.optimal_solution = population[solver.stats.best_index].snapshot()
+
+    solver.rng.bit_generator.state = meta["rng"]
+    random.setstate((meta["random_version"], tuple(random_internal.tolist()), meta["gauss"]))
+    return solver
+
+
+class CheckpointWriter:
+    """An observer for GALabyrinthSolver that writes a checkpoint every few generations in the background.
+
+    The state is captured between two generations, which only takes copying the population into arrays; the
+    file is written by a background thread while the solver goes on. If a write is still running when the
+    next checkpoint is due, that checkpoint is skipped rather than making the solver wait.
+    """
+
+    def __init__(self, solver: GALabyrinthSolver, path: str, interval: int = 10):
+        """Initializes a CheckpointWriter object. Register it with `solver.add_observer`.
+
+        Args:
+        - solver (GALabyrinthSolver): The solver to checkpoint.
+        - path (str): The checkpoint file, replaced by every new checkpoint.
+        - interval (int): The number of generations between two checkpoints.
+        """
+        self.solver = solver
+        self.path = path
+        self.interval = interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CheckpointWriter")
+        self.pending: Optional[Future] = None
+        self.written = 0
+        self.skipped = 0
+
+    def __call__(self, stats: GenerationStats) -> None:
+        if stats.generation % self.interval:
+            return
+        if self.pending is not None and not self.pending.done():
+            self.skipped += 1
+            return
+        self.pending = self.executor.submit(write_checkpoint, encode_checkpoint(self.solver), self.path)
+        self.written += 1
+
+    def close(self) -> None:
+        """Waits for the last checkpoint to be written and stops the background thread.
+        """
+        self.executor.shutdown(wait=True)
+        if self.pending is not None:
+            self.pending.result()
@@ -0,0 +1,145 @@
+from array import array
+from collections import deque
+from typing import List, Tuple
+
+import numpy as np
+
+from PathFinder import NoPathError
+
+
+class DistanceField:
+    """A table of shortest-path distances from every cell of a labyrinth to a single goal cell.
+
+    The table is filled by one breadth-first search outward from the goal, so looking up how far any cell
+    is from the goal is a constant-time array access. The field is recomputed whenever the labyrinth
+    reports that its grid has changed. Computing it unpacks a PackedGrid to one byte per cell, on top of the
+    four bytes per cell of the distances themselves.
+    """
+    UNREACHABLE = -1
+    OFFSETS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+    def __init__(self, labyrinth, goal: Tuple[int, int]):
+        """Initializes a DistanceField object for the given labyrinth and goal.
+
+        Args:
+        - labyrinth: The labyrinth object representing the maze.
+        - goal (Tuple[int, int]): The cell all distances are measured to.
+        """
+        self.labyrinth = labyrinth
+        self.goal = goal
+        self.distances: np.ndarray = None
+        self.version: int = -1
+        self._refresh()
+
+    @classmethod
+    def from_distances(cls, labyrinth, goal: Tuple[int, int], distances: np.ndarray) -> "DistanceField":
+        """Creates a DistanceField from distances that were already computed for the labyrinth and goal.
+
+        Args:
+        - labyrinth: The labyrinth object the distances belong to.
+        - goal (Tuple[int, int]): The cell the distances are measured to.
+        - distances (np.ndarray): The distance of every cell to the goal, of shape (height, width).
+
+        Returns:
+        - DistanceField: A field that uses the given distances until the labyrinth changes.
+        """
+        field = cls.__new__(cls)
+        field.labyrinth = labyrinth
+        field.goal = goal
+        field.distances = distances
+        field.version = labyrinth.version
+        return field
+
+    def get_distances(self) -> np.ndarray:
+        """Returns the distances of all cells to the goal, recomputing them first if the labyrinth changed.
+
+        Returns:
+        - np.ndarray: An int32 array of shape (height, width) holding UNREACHABLE for cells cut off from the goal.
+        """
+        self._refresh()
+        return self.distances
+
+    def _refresh(self) -> None:
+        """Recomputes the distances if the labyrinth grid changed since the last computation.
+        """
+        if self.version == self.labyrinth.version:
+            return
+        height, width = self.labyrinth.height, self.labyrinth.width
+        # Flat, one byte per cell: indexing bytes is much cheaper than indexing the array cell by cell.
+        passable = self.labyrinth.get_labyrinth().tobytes()
+        distances = array('i', [DistanceField.UNREACHABLE]) * (height * width)
+        goal_index = self.goal[0] * width + self.goal[1]
+        if passable[goal_index]:
+            distances[goal_index] = 0
+            queue = deque([goal_index])
+            while queue:
+                index = queue.popleft()
+                next_distance = distances[index] + 1
+                x = index % width
+                for neighbor, inside in ((index + 1, x + 1 < width), (index - 1, x > 0),
+                                         (index + width, index + width < height * width),
+                                         (index - width, index >= width)):
+                    if inside and passable[neighbor] and distances[neighbor] == DistanceField.UNREACHABLE:
+                        distances[neighbor] = next_distance
+                        queue.append(neighbor)
+        self.distances = np.frombuffer(distances, dtype=np.intc).reshape(height, width)
+        self.version = self.labyrinth.version
+
+    def distance(self, cell: Tuple[int, int]) -> int:
+        """Returns the number of steps on the shortest path from a cell to the goal.
+
+        Args:
+        - cell (Tuple[int, int]): The cell to look up.
+
+        Returns:
+        - int: The number of steps to the goal, or UNREACHABLE if the goal cannot be reached.
+        """
+        self._refresh()
+        return self.distances.item(cell[0], cell[1])
+
+    def path_length(self, cell: Tuple[int, int]) -> int:
+        """Returns the number of cells on the shortest path from a cell to the goal, both ends included.
+
+        This is the length of the list `find_path` would return for the same cell and goal.
+
+        Args:
+        - cell (Tuple[int, int]): The cell to look up.
+
+        Returns:
+        - int: The number of cells on the shortest path.
+
+        Raises:
+        - NoPathError: If the goal cannot be reached from the cell.
+        """
+        distance = self.distance(cell)
+        if distance == DistanceField.UNREACHABLE:
+            raise NoPathError(cell, self.goal)
+        return distance + 1
+
+    def walk(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Returns a shortest path from a cell to the goal by following the distance gradient downhill.
+
+        Args:
+        - start (Tuple[int, int]): The cell to start walking from.
+
+        Returns:
+        - List[Tuple[int, int]]: The cells of the path, from start to goal.
+
+        Raises:
+        - NoPathError: If the goal cannot be reached from the start cell.
+        """
+        remaining = self.distance(start)
+        if remaining == DistanceField.UNREACHABLE:
+            raise NoPathError(start, self.goal)
+        height, width = self.distances.shape
+        path = [start]
+        y, x = start
+        while remaining > 0:
+            for dy, dx in DistanceField.OFFSETS:
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < height and 0 <= nx < width and self.distances.item(ny, nx) == remaining - 1:
+                    y, x = ny, nx
+                    break
+            remaining -= 1
+            path.append((y, x))
+        return path
@@ -0,0 +1,286 @@
+import os
+import struct
+import subprocess
+import tempfile
+import zlib
+from itertools import chain
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from GenerationStats import GenerationStats
+from PathPalette import PathPalette
+
+# Renders generations of a GALabyrinthSolver into RGB images without a display, so runs on machines without
+# a screen can still be watched afterwards. Only numpy and the standard library are used; there is no pygame
+# here, and videos are encoded by an ffmpeg process fed through a pipe.
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+WALL_COLOR = (0, 0, 0)
+PASSAGE_COLOR = (255, 255, 255)
+START_COLOR = (0, 255, 0)
+END_COLOR = (0, 255, 0)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def encode_png(pixels: np.ndarray, level: int = 1, rows: Optional[np.ndarray] = None) -> bytes:
+    """Encodes an RGB image as a PNG file.
+
+    Args:
+    - pixels (np.ndarray): The image, an uint8 array of shape (height, width, 3).
+    - level (int): The zlib compression level. Low levels are much faster and, for the large areas of one
+      color a labyrinth has, barely bigger.
+    - rows (Optional[np.ndarray]): A buffer of shape (height, width * 3 + 1) to lay out the rows in, so
+      encoding many images of the same size allocates it only once.
+
+    Returns:
+    - bytes: The PNG file.
+    """
+    height, width, _ = pixels.shape
+    if rows is None:
+        rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    # Every row starts with its filter type, 0 for none.
+    rows[:, 0] = 0
+    rows[:, 1:] = pixels.reshape(height, width * 3)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"".join((PNG_SIGNATURE, _png_chunk(b"IHDR", header),
+                     _png_chunk(b"IDAT", zlib.compress(rows.data, level)), _png_chunk(b"IEND", b"")))
+
+
+class FrameRenderer:
+    """Draws a labyrinth with paths on top into an RGB image held in a numpy array.
+
+    The image of the bare labyrinth is rendered once and only rendered again if the labyrinth changes. Every
+    frame starts from a copy of it into a buffer that is allocated once, so rendering does not allocate any
+    images after the first frame.
+    """
+
+    def __init__(self, labyrinth, cell_size: int = 1, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        """Initializes a FrameRenderer object.
+
+        Args:
+        - labyrinth: The labyrinth object representing the maze.
+        - cell_size (int): The width and height of every cell in pixels.
+        - start (Optional[Tuple[int, int]]): The start cell, drawn in START_COLOR over the paths.
+        - goal (Optional[Tuple[int, int]]): The goal cell, drawn in END_COLOR over the paths.
+        """
+        if cell_size < 1:
+            raise ValueError(f"The cell size must be at least 1, not {cell_size}")
+        self.labyrinth = labyrinth
+        self.cell_size = cell_size
+        self.start = start
+        self.goal = goal
+        self.height, self.width = labyrinth.height, labyrinth.width
+        self._maze = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._maze_version = -1
+        self._cells = np.empty_like(self._maze)
+        self._frame = (self._cells if cell_size == 1 else
+                       np.empty((self.height * cell_size, self.width * cell_size, 3), dtype=np.uint8))
+        self.path_colors = PathPalette()
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Returns the shape of the frames, (height, width, 3) in pixels.
+        """
+        return self._frame.shape
+
+    def _refresh_maze(self) -> None:
+        if self._maze_version == self.labyrinth.version:
+            return
+        grid = np.asarray(self.labyrinth.get_labyrinth(), dtype=bool)
+        self._maze[...] = WALL_COLOR
+        self._maze[grid] = PASSAGE_COLOR
+        self._maze_version = self.labyrinth.version
+
+    def render(self, paths: Iterable, colors: Optional[np.ndarray] = None) -> np.ndarray:
+        """Draws the labyrinth with paths on top. Where paths cross, the later path is drawn on top.
+
+        Args:
+        - paths (Iterable): The paths to draw, each a sequence of (y, x) cells.
+        - colors (Optional[np.ndarray]): The RGB color of every path. Defaults to the `path_colors` palette, so
+          the path at the same position keeps its color from one frame to the next.
+
+        Returns:
+        - np.ndarray: The frame, an uint8 array of shape `shape`. It is overwritten by the next call, so copy
+          it to keep it.
+        """
+        self._refresh_maze()
+        np.copyto(self._cells, self._maze)
+        paths = list(paths)
+        if paths:
+            lengths = np.fromiter((len(path) for path in paths), dtype=np.int64, count=len(paths))
+            # Flattening every (y, x) pair into one stream is about twice as fast as an array of the pairs.
+            cells = np.fromiter(chain.from_iterable(chain.from_iterable(paths)), dtype=np.int64,
+                                count=2 * int(lengths.sum())).reshape(-1, 2)
+            owners = np.repeat(np.arange(len(paths)), lengths)
+            if colors is None:
+                colors = self.path_colors(len(paths))
+            self._cells.reshape(-1, 3)[cells[:, 0] * self.width + cells[:, 1]] = np.asarray(colors)[owners, :3]
+        if self.start is not None:
+            self._cells[self.start] = START_COLOR
+        if self.goal is not None:
+            self._cells[self.goal] = END_COLOR
+        if self.cell_size > 1:
+            size = self.cell_size
+            self._frame.reshape(self.height, size, self.width, size, 3)[...] = self._cells[:, None, :, None, :]
+        return self._frame
+
+
+class PNGSequenceSink:
+    """Writes every frame to its own numbered PNG file in a directory.
+    """
+
+    def __init__(self, directory: str, pattern: str = "frame_{:06d}.png", level: int = 1):
+        """Initializes a PNGSequenceSink object, creating its directory if needed.
+
+        Args:
+        - directory (str): The directory to write the frames to.
+        - pattern (str): The file name of a frame, formatted with the number of the frame.
+        - level (int): The zlib compression level of the PNG files.
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.level = level
+        self.frames = 0
+        self._rows: Optional[np.ndarray] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame: np.ndarray) -> None:
+        """Writes a frame to the next file of the sequence.
+
+        Args:
+        - frame (np.ndarray): The frame, an uint8 array of shape (height, width, 3).
+        """
+        height, width, _ = frame.shape
+        if self._rows is None or self._rows.shape != (height, width * 3 + 1):
+            self._rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+        with open(os.path.join(self.directory, self.pattern.format(self.frames)), "wb") as frame_file:
+            frame_file.write(encode_png(frame, self.level, self._rows))
+        self.frames += 1
+
+    def close(self) -> None:
+        """Does nothing; every frame is complete once it is written.
+        """
+
+
+class FFmpegSink:
+    """Pipes frames as raw RGB video into an ffmpeg process that encodes them into a video file.
+
+    The process is started with the first frame, whose size all later frames must have. If it fails, writing
+    or closing raises a RuntimeError with what ffmpeg printed to its standard error.
+    """
+
+    def __init__(self, path: str, frame_rate: int = 30, ffmpeg: str = "ffmpeg"):
+        """Initializes an FFmpegSink object.
+
+        Args:
+        - path (str): The video file to write. Its extension decides the container, for example ".mp4".
+        - frame_rate (int): The frames per second of the video.
+        - ffmpeg (str): The ffmpeg executable.
+        """
+        self.path = path
+        self.frame_rate = frame_rate
+        self.ffmpeg = ffmpeg
+        self.frames = 0
+        self.process: Optional[subprocess.Popen] = None
+        # A file rather than a pipe, so an ffmpeg printing a lot never blocks waiting for it to be read.
+        self.errors = tempfile.TemporaryFile()
+
+    def _start(self, width: int, height: int) -> subprocess.Popen:
+        # yuv420p, which every player supports, needs an even width and height, so pad odd sizes by a pixel.
+        command = [self.ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                   "-s", f"{width}x{height}", "-r", str(self.frame_rate), "-i", "-",
+                   "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", self.path]
+        try:
+            return subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self.errors)
+        except FileNotFoundError:
+            raise RuntimeError(f"{self.ffmpeg} was not found; install ffmpeg or write PNG frames instead") from None
+
+    def write(self, frame: np.ndarray) -> None:
+        """Sends a frame to the encoder.
+
+        Args:
+        - frame (np.ndarray): The frame, an uint8 array of shape (height, width, 3).
+
+        Raises:
+        - RuntimeError: If the encoder is not installed or stopped.
+        """
+        if self.process is None:
+            self.process = self._start(frame.shape[1], frame.shape[0])
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            raise self._failure() from None
+        self.frames += 1
+
+    def close(self) -> None:
+        """Ends the video and waits for the encoder to finish writing it.
+
+        Raises:
+        - RuntimeError: If the encoder failed.
+        """
+        if self.process is None:
+            self.errors.close()
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self.process.wait():
+            raise self._failure()
+        self.errors.close()
+
+    def _failure(self) -> RuntimeError:
+        """Waits for the stopped encoder and describes why it failed.
+        """
+        self.process.wait()
+        self.errors.seek(0)
+        message = self.errors.read().decode(errors="replace").strip()
+        self.errors.close()
+        return RuntimeError(f"{self.ffmpeg} exited with code {self.process.returncode} writing {self.path}"
+                            + (f": {message}" if message else ""))
+
+
+class FrameRecorder:
+    """An observer for GALabyrinthSolver that renders every few generations offscreen and writes them to a sink.
+
+    Frames are rendered from the paths of the whole population, with a FrameRenderer, and passed to a
+    PNGSequenceSink, an FFmpegSink or anything else with `write(frame)` and `close()`. The last generation of
+    a run is always recorded. The time spent counts towards the solver's rendering phase.
+    """
+
+    def __init__(self, solver, sink, stride: int = 10, cell_size: int = 1):
+        """Initializes a FrameRecorder object. Register it with `solver.add_observer`.
+
+        Args:
+        - solver (GALabyrinthSolver): The solver to record.
+        - sink: Where the frames go.
+        - stride (int): The number of generations between two frames.
+        - cell_size (int): The width and height of every cell in pixels.
+        """
+        if stride < 1:
+            raise ValueError(f"The stride must be at least 1, not {stride}")
+        self.solver = solver
+        self.sink = sink
+        self.stride = stride
+        self.renderer = FrameRenderer(solver.labyrinth, cell_size, solver.init, solver.end)
+
+    def __call__(self, stats: GenerationStats) -> None:
+        if stats.generation % self.stride and not self.solver.is_done():
+            return
+        self.record()
+
+    def record(self) -> None:
+        """Renders the current generation of the solver and writes it to the sink, whatever the stride.
+        """
+        with self.solver.timer.phase("rendering"):
+            self.sink.write(self.renderer.render(individual.path for individual in self.solver.population))
+
+    def close(self) -> None:
+        """Closes the sink, finishing its files.
+        """
+        self.sink.close()
@@ -1,20 +1,38 @@
 from Solution import *
 import random
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator
 from heapq import nlargest
 
+import numpy as np
+
+from BatchRollout import batch_solve
+from ParallelEvaluator import ParallelEvaluator
+from PathStore import PathStore
+from JunctionGraph import JunctionGraph
+from GenerationStats import GenerationStats, PhaseTimer
+from Selection import STRATEGIES, select_pairs
+
 
 class GALabyrinthSolver:
     """
     A class for solving a labyrinth using a genetic algorithm.
     """
     ELITISM_RATE = 0.1
+    ROLLOUT_BACKENDS = ("python", "numpy", "corridor")
+    SELECTION_STRATEGIES = STRATEGIES
+    TOURNAMENT_RATE = 0.2
     population: List[Solution] = []
     best_population: List[Tuple[int, int]] = []
     found_solution: bool = False
-    optimal_solution: Solution = None
+    # A snapshot, as the solution objects themselves are reused for later generations.
+    optimal_solution: Optional[SolutionSnapshot] = None
+    stats: GenerationStats = None
 
     def __init__(self, generation: int, population_size: int, mutation_rate: float, initial_coords: Tuple[int, int],
-                 end: Tuple[int, int], labyrinth):
+                 end: Tuple[int, int], labyrinth, rollout_backend: str = "python", workers: Optional[int] = None,
+                 selection: str = "tournament"):
         """
         Initializes an instance of GALabyrinthSolver class.
 
@@ -25,8 +43,32 @@ class GALabyrinthSolver:
             - initial_coords (Tuple[int, int]): Initial coordinates.
             - end (Tuple[int, int]): Final coordinates.
             - labyrinth (Labyrinth): The Labyrinth instance to solve.
+            - rollout_backend (str): How solutions are moved through the labyrinth. "python" solves every
+              solution on its own, "numpy" moves the whole population at once with `batch_solve`, and
+              "corridor" solves every solution on its own but only chooses at junctions of a `JunctionGraph`.
+            - workers (Optional[int]): If given, solutions are solved and evaluated on this many worker
+              processes by a `ParallelEvaluator`. Call `close` when done to stop them.
+            - selection (str): How parents are chosen, one of SELECTION_STRATEGIES: the winners of tournaments
+              between TOURNAMENT_RATE of the population, a draw weighted by fitness rank, or stochastic
+              universal sampling over the fitness scores.
+
+        """
+        self._setup(generation, population_size, mutation_rate, initial_coords, end, labyrinth, rollout_backend,
+                    workers, selection)
+        self.initialize_population(initial_coords, end, labyrinth)
 
+    def _setup(self, generation: int, population_size: int, mutation_rate: float, initial_coords: Tuple[int, int],
+               end: Tuple[int, int], labyrinth, rollout_backend: str, workers: Optional[int], selection: str,
+               evaluator_seed: Optional[int] = None) -> None:
+        """Prepares everything but the population; takes the same arguments as the constructor.
+
+        Args:
+            - evaluator_seed (Optional[int]): The seed of the parallel evaluator. Defaults to a random seed.
         """
+        if rollout_backend not in self.ROLLOUT_BACKENDS:
+            raise ValueError(f"Unknown rollout backend {rollout_backend!r}, expected one of {self.ROLLOUT_BACKENDS}")
+        if selection not in self.SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown selection strategy {selection!r}, expected one of {self.SELECTION_STRATEGIES}")
         self.generation = generation
         self.previous_best_fitness = 0
         self.current_generation = 0
@@ -35,9 +77,32 @@ class GALabyrinthSolver:
         self.mutation_rate = mutation_rate
         self.init = initial_coords
         self.end = end
-        self.best_population = find_path(
-            initial_coords, end, labyrinth.get_labyrinth())
-        self.initialize_population(initial_coords, end, labyrinth)
+        self.labyrinth = labyrinth
+        self.rollout_backend = rollout_backend
+        self.selection = selection
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        if labyrinth.stored_distances is not None and labyrinth.goal_position == tuple(end):
+            self.distance_field = DistanceField.from_distances(labyrinth, end, labyrinth.stored_distances)
+        else:
+            self.distance_field = DistanceField(labyrinth, end)
+        self.best_population = self.distance_field.walk(initial_coords)
+        self.path_store = PathStore()
+        self.junction_graph = (JunctionGraph(labyrinth, pins=(initial_coords, end))
+                               if rollout_backend == "corridor" else None)
+        self.context = SolutionContext.create(initial_coords, end, labyrinth, self.best_population,
+                                              self.distance_field, self.path_store, self.junction_graph)
+        # Solutions that left the population a generation ago, reused as the children of the next one.
+        self.spares: List[Solution] = []
+        self.timer = PhaseTimer()
+        self.evaluation_count = 0
+        self.skipped_evaluation_count = 0
+        self.observers: List[Callable[[GenerationStats], None]] = []
+        self.evaluator = None
+        if workers is not None:
+            self.evaluator = ParallelEvaluator(labyrinth, self.distance_field, initial_coords, end,
+                                               self.best_population, workers=workers,
+                                               seed=random.getrandbits(64) if evaluator_seed is None
+                                               else evaluator_seed, rollout_backend=rollout_backend)
 
     def initialize_population(self, init: Tuple[int, int], end: Tuple[int, int], maze) -> None:
         """Initializes the population with solutions based on the best known path.
@@ -47,64 +112,187 @@ class GALabyrinthSolver:
             - end (Tuple[int, int]): Final coordinates.
             - maze (List[List[int]]): The maze.
         """
-        self.population = [Solution(init, end, maze, self.best_population)
-                           for _ in range(self.population_size)]
+        self.population = [Solution(self.context) for _ in range(self.population_size)]
         self._update_fitness_scores()
+        self.stats = GenerationStats.from_population(self, self.timer.collect())
+
+    def add_observer(self, observer: Callable[[GenerationStats], None]) -> None:
+        """Registers a function to be called with the statistics of every new generation.
+
+        Args:
+            - observer (Callable[[GenerationStats], None]): The function, such as a `StatsWriter`.
+        """
+        self.observers.append(observer)
 
     def get_highest_fitness(self) -> float:
-        return max(p.fitness_score for p in self.population)
+        return self.stats.max_fitness
+
+    def select_emigrants(self, count: int) -> List[List[Tuple[int, int]]]:
+        """Returns the paths of the fittest solutions, to be sent to another population.
+
+        Args:
+        - count (int): How many paths to return.
+
+        Returns:
+        - List[List[Tuple[int, int]]]: The paths, fittest first.
+        """
+        return [p.path for p in nlargest(count, self.population, key=lambda p: p.fitness_score)]
+
+    def receive_immigrants(self, paths: List[List[Tuple[int, int]]]) -> None:
+        """Replaces the least fit solutions with solutions that follow the given paths.
+
+        Args:
+        - paths (List[List[Tuple[int, int]]]): The complete paths of the arriving solutions.
+        """
+        weakest = sorted(range(len(self.population)), key=lambda i: self.population[i].fitness_score)
+        # The replaced solutions are not needed anymore, so each one is reused for its immigrant.
+        for index, path in zip(weakest, paths):
+            immigrant = self.population[index]
+            immigrant.path = path
+            immigrant.can_move = False
+            immigrant.has_reached_end = path[-1] == self.end
+            immigrant.score()
+        self.stats = GenerationStats.from_population(self, self.stats.timings)
+        self.optimal_solution = self.population[self.stats.best_index].snapshot()
+        if self.optimal_solution.fitness_score == 1:
+            self.found_solution = True
+
+    def _select_parents(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Draws the pairs of distinct parents of all children of the next generation at once.
+
+        Args:
+            - count (int): The number of children.
+
+        Returns:
+            - Tuple[np.ndarray, np.ndarray]: The population indices of the first and of the second parents.
+        """
+        fitness = np.fromiter((p.fitness_score for p in self.population), float, len(self.population))
+        return select_pairs(self.selection, fitness, count, self.rng,
+                            tournament_size=int(len(self.population) * self.TOURNAMENT_RATE))
+
+    def is_done(self) -> bool:
+        """Returns whether a solution reached the end position or all generations have been evolved.
+        """
+        return self.found_solution or self.current_generation >= self.generation
 
-    def _select_parent(self) -> Solution:
-        tournament_size = int(len(self.population) * 0.2)  # Adjust the tournament size as needed
-        tournament_subset = random.sample(self.population, tournament_size)
-        best_individual = max(tournament_subset, key=lambda p: p.fitness_score)
-        return best_individual
+    def run(self) -> Iterator[GenerationStats]:
+        """Evolves generations until the run is done, yielding the statistics of every generation.
 
-    def _select_parents(self) -> Tuple[Solution, Solution]:
-        parentA = self._select_parent()
-        parentB = self._select_parent()
-        while parentA == parentB:  # Ensure two distinct parents are selected
-            parentB = self._select_parent()
-        return parentA, parentB
+        The current generation is yielded first. The next one is only evolved when it is asked for, so
+        stopping the iteration stops the run.
+
+        Yields:
+            - GenerationStats: The statistics of the current generation, then of every new one.
+        """
+        yield self.stats
+        while not self.is_done():
+            self.create_next_generation()
+            yield self.stats
+
+    async def run_async(self, executor: Optional[Executor] = None) -> AsyncIterator[GenerationStats]:
+        """Evolves generations like `run`, but in an executor so the event loop stays free meanwhile.
+
+        A generation is only started once the consumer asks for it, so a slow consumer holds the run back
+        instead of piling up statistics. If the consumer is cancelled while a generation is being evolved,
+        the generation is finished before the cancellation goes through, leaving the solver consistent.
+
+        Args:
+            - executor (Optional[Executor]): The executor to evolve in. Defaults to the loop's default executor.
+
+        Yields:
+            - GenerationStats: The statistics of the current generation, then of every new one.
+        """
+        loop = asyncio.get_running_loop()
+        yield self.stats
+        while not self.is_done():
+            future = loop.run_in_executor(executor, self.create_next_generation)
+            try:
+                await asyncio.shield(future)
+            except asyncio.CancelledError:
+                await asyncio.wait([future])
+                raise
+            yield self.stats
+
+    def close(self) -> None:
+        """Stops the worker processes of the parallel evaluator, if there is one.
+        """
+        if self.evaluator is not None:
+            self.evaluator.close()
 
     def _update_fitness_scores(self) -> None:
-        for individual in self.population:
-            individual.evaluate()
+        # Only solutions that are new or whose path changed need a score; the rest keep theirs.
+        dirty = [individual for individual in self.population if individual.dirty]
+        self.evaluation_count = len(dirty)
+        self.skipped_evaluation_count = len(self.population) - len(dirty)
+        # The worker processes both solve and score, so all of their time counts as rollout.
+        if self.evaluator is not None:
+            with self.timer.phase("rollout"):
+                self.evaluator.evaluate(dirty, self.current_generation)
+            return
+        with self.timer.phase("rollout"):
+            if self.rollout_backend == "numpy":
+                batch_solve(dirty, self.rng)
+            else:
+                for individual in dirty:
+                    individual.solve()
+        with self.timer.phase("evaluation"):
+            for individual in dirty:
+                individual.score()
 
     def _parent_selection_and_crossover(self) -> None:
         # Elitism: Select the top solutions to carry over to the next generation
         num_elites = int(self.ELITISM_RATE * self.population_size)
-        elites = nlargest(num_elites, self.population,
-                          key=lambda p: p.fitness_score)
+        population = self.population
+        with self.timer.phase("selection"):
+            elite_indices = nlargest(num_elites, range(len(population)),
+                                     key=lambda i: population[i].fitness_score)
 
         # Crossover the rest of the population
-        new_population = elites
-        while len(new_population) < self.population_size:
-            parentA, parentB = self._select_parents()
-            child = parentA.crossover(parentB)
-            new_population.append(child)
+        new_population = [population[i] for i in elite_indices]
+        with self.timer.phase("selection"):
+            parentsA, parentsB = self._select_parents(self.population_size - len(new_population))
+        with self.timer.phase("crossover"):
+            # The children reuse the solutions that were retired a generation ago. The solutions retired now
+            # may still be parents, so they only become spares once every child is made.
+            spares = self.spares
+            new_population.extend(population[a].crossover(population[b], spares.pop() if spares else None)
+                                  for a, b in zip(parentsA.tolist(), parentsB.tolist()))
+            kept = set(elite_indices)
+            for index, individual in enumerate(population):
+                if index not in kept:
+                    individual.reset()
+                    spares.append(individual)
 
         self.population = new_population
 
     def _random_mutation(self):
-        for individual in self.population:
-            if random.random() <= self.mutation_rate:
-                individual.mutate()
+        with self.timer.phase("mutation"):
+            for individual in self.population:
+                if random.random() <= self.mutation_rate:
+                    individual.mutate()
 
     def create_next_generation(self) -> None:
         self.current_generation += 1
         self._parent_selection_and_crossover()
-        self.update_mutation_rate()
+        # The elites come first and the children are not scored yet, so the best fitness is the first elite's.
+        self.update_mutation_rate(self.population[0].fitness_score
+                                  if int(self.ELITISM_RATE * self.population_size) else 0)
         self._random_mutation()
         self._update_fitness_scores()
-        self.update_elitism_rate()
-        self.optimal_solution = max(
-            self.population, key=lambda x: x.fitness_score)
+        self.stats = GenerationStats.from_population(self)
+        self.update_elitism_rate(self.stats.max_fitness)
+        self.optimal_solution = self.population[self.stats.best_index].snapshot()
         if self.optimal_solution.fitness_score == 1:
-            self.found_solution = True 
+            self.found_solution = True
+        self.stats.elitism_rate = self.ELITISM_RATE
+        self.stats.found_solution = self.found_solution
+        self.stats.timings = self.timer.collect()
+        for observer in self.observers:
+            observer(self.stats)
 
-    def update_elitism_rate(self):
-        current_best_fitness = max(p.fitness_score for p in self.population)
+    def update_elitism_rate(self, current_best_fitness: Optional[float] = None):
+        if current_best_fitness is None:
+            current_best_fitness = max(p.fitness_score for p in self.population)
         if current_best_fitness <= self.previous_best_fitness:
             self.no_improvement_streak += 1
         else:
@@ -117,8 +305,9 @@ class GALabyrinthSolver:
 
         self.previous_best_fitness = current_best_fitness
 
-    def update_mutation_rate(self):
-        current_best_fitness = max(p.fitness_score for p in self.population)
+    def update_mutation_rate(self, current_best_fitness: Optional[float] = None):
+        if current_best_fitness is None:
+            current_best_fitness = max(p.fitness_score for p in self.population)
         if current_best_fitness <= self.previous_best_fitness:
             self.mutation_rate = min(1, self.mutation_rate * 1.05)
         else:
@@ -0,0 +1,157 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, TextIO, Union
+
+import numpy as np
+
+PHASES = ("selection", "crossover", "mutation", "rollout", "evaluation", "rendering")
+
+
+class PhaseTimer:
+    """Adds up the wall-clock time spent in each phase of a generation.
+
+    Code that belongs to a phase runs inside `with timer.phase(name):`. The solver takes the totals out with
+    `collect` when it finishes a generation, so time spent between two generations, such as rendering the
+    previous one, is counted towards the next.
+    """
+
+    def __init__(self):
+        """Initializes a PhaseTimer object with no time recorded.
+        """
+        self.timings: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the body of a with statement and adds it to a phase.
+
+        Args:
+        - name (str): The phase, one of PHASES.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def add(self, name: str, seconds: float) -> None:
+        """Adds time measured elsewhere to a phase.
+
+        Args:
+        - name (str): The phase, one of PHASES.
+        - seconds (float): The time to add.
+        """
+        self.timings[name] += seconds
+
+    def collect(self) -> Dict[str, float]:
+        """Returns the time recorded per phase and starts recording from zero.
+        """
+        timings = self.timings
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        return timings
+
+
+class GenerationStats:
+    """The statistics of one generation of a GALabyrinthSolver.
+
+    All values are computed from one pass over the population when the generation is finished; the solver
+    reads its own adaptation inputs from here instead of scanning the population again.
+    """
+
+    def __init__(self, generation: int, fitness_scores: np.ndarray, path_lengths: np.ndarray, distinct_ends: int,
+                 mutation_rate: float, elitism_rate: float, found_solution: bool, timings: Dict[str, float],
+                 evaluations: int = 0, skipped_evaluations: int = 0):
+        """Initializes a GenerationStats object.
+
+        Args:
+        - generation (int): The number of the generation.
+        - fitness_scores (np.ndarray): The fitness score of every solution.
+        - path_lengths (np.ndarray): The number of cells of the path of every solution.
+        - distinct_ends (int): The number of different cells the paths of the solutions end in.
+        - mutation_rate (float): The mutation rate of the solver after the generation.
+        - elitism_rate (float): The elitism rate of the solver after the generation.
+        - found_solution (bool): Whether a solution reached the end position.
+        - timings (Dict[str, float]): The seconds spent in every phase of the generation.
+        - evaluations (int): The number of solutions that were solved and scored.
+        - skipped_evaluations (int): The number of unchanged solutions that kept their score.
+        """
+        self.generation = generation
+        self.population_size = len(fitness_scores)
+        self.best_index = int(np.argmax(fitness_scores))
+        self.max_fitness = float(fitness_scores[self.best_index])
+        self.mean_fitness = float(fitness_scores.mean())
+        self.median_fitness = float(np.median(fitness_scores))
+        self.min_path_length = int(path_lengths.min())
+        self.mean_path_length = float(path_lengths.mean())
+        self.max_path_length = int(path_lengths.max())
+        self.path_length_std = float(path_lengths.std())
+        self.diversity = distinct_ends / self.population_size
+        self.mutation_rate = mutation_rate
+        self.elitism_rate = elitism_rate
+        self.found_solution = found_solution
+        self.timings = timings
+        self.evaluations = evaluations
+        self.skipped_evaluations = skipped_evaluations
+
+    @classmethod
+    def from_population(cls, solver, timings: Optional[Dict[str, float]] = None) -> "GenerationStats":
+        """Computes the statistics of the current generation of a solver.
+
+        Args:
+        - solver (GALabyrinthSolver): The solver.
+        - timings (Optional[Dict[str, float]]): The seconds spent in every phase. Defaults to none recorded.
+
+        Returns:
+        - GenerationStats: The statistics of the generation.
+        """
+        population = solver.population
+        fitness_scores = np.empty(len(population))
+        path_lengths = np.empty(len(population), dtype=np.int64)
+        ends = set()
+        for index, individual in enumerate(population):
+            fitness_scores[index] = individual.fitness_score
+            path_lengths[index] = individual.path_length()
+            ends.add(individual.last_position())
+        return cls(solver.current_generation, fitness_scores, path_lengths, len(ends), solver.mutation_rate,
+                   solver.ELITISM_RATE, solver.found_solution,
+                   dict.fromkeys(PHASES, 0.0) if timings is None else timings,
+                   solver.evaluation_count, solver.skipped_evaluation_count)
+
+    def as_dict(self) -> Dict:
+        """Returns the statistics as a flat dictionary, with the timings prefixed by "time_".
+        """
+        row = {"generation": self.generation, "population_size": self.population_size,
+               "max_fitness": self.max_fitness, "mean_fitness": self.mean_fitness,
+               "median_fitness": self.median_fitness, "min_path_length": self.min_path_length,
+               "mean_path_length": self.mean_path_length, "max_path_length": self.max_path_length,
+               "path_length_std": self.path_length_std, "diversity": self.diversity,
+               "mutation_rate": self.mutation_rate, "elitism_rate": self.elitism_rate,
+               "found_solution": self.found_solution, "evaluations": self.evaluations,
+               "skipped_evaluations": self.skipped_evaluations}
+        row.update((f"time_{phase}", seconds) for phase, seconds in self.timings.items())
+        return row
+
+
+class StatsWriter:
+    """An observer for GALabyrinthSolver that writes the statistics of every generation as a JSON line.
+    """
+
+    def __init__(self, output: Union[str, TextIO]):
+        """Initializes a StatsWriter object.
+
+        Args:
+        - output (Union[str, TextIO]): The file to write to, as a path or as an open text stream. A path is
+          opened for appending and closed by `close`.
+        """
+        self.owns_output = isinstance(output, str)
+        self.output = open(output, "a") if self.owns_output else output
+
+    def __call__(self, stats: GenerationStats) -> None:
+        self.output.write(json.dumps(stats.as_dict()) + "\n")
+        self.output.flush()
+
+    def close(self) -> None:
+        """Closes the file if the writer opened it.
+        """
+        if self.owns_output:
+            self.output.close()
@@ -0,0 +1,163 @@
+import multiprocessing
+import random
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from DistanceField import DistanceField
+from GALabyrinthSolver import GALabyrinthSolver
+from ParallelEvaluator import SharedLabyrinth, open_shared_array, share_array
+
+
+def _island_main(connection: Connection, grid_name: str, distances_name: str, shape: Tuple[int, int],
+                 init: Tuple[int, int], end: Tuple[int, int], generations: int, population_size: int,
+                 mutation_rate: float, rollout_backend: str, seed: int) -> None:
+    """Runs one island in its own process, answering the commands of the IslandModel driver.
+
+    Every command is an epoch: the island takes in its immigrants, evolves for some generations and answers
+    with its statistics and its emigrants. A command of None stops the island.
+    """
+    grid_block, grid = open_shared_array(grid_name, shape, bool)
+    distances_block, distances = open_shared_array(distances_name, shape, np.intc)
+    labyrinth = SharedLabyrinth(grid, goal_position=tuple(end), stored_distances=distances)
+    random.seed(seed)
+    solver = GALabyrinthSolver(generations, population_size, mutation_rate, init, end, labyrinth,
+                               rollout_backend=rollout_backend)
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+        immigrants, epoch_generations, emigrant_count = command
+        solver.receive_immigrants(immigrants)
+        for _ in range(epoch_generations):
+            if solver.is_done():
+                break
+            solver.create_next_generation()
+        stats = solver.stats.as_dict()
+        stats["found_solution"] = solver.found_solution
+        stats["done"] = solver.is_done()
+        connection.send((stats, solver.population[solver.stats.best_index].path,
+                         solver.select_emigrants(emigrant_count)))
+    connection.close()
+    del grid, distances
+    grid_block.close()
+    distances_block.close()
+
+
+class IslandModel:
+    """Runs several independent populations in separate processes that regularly exchange their best solutions.
+
+    Every island is a GALabyrinthSolver with its own mutation and elitism adaptation. Every few generations,
+    each island sends copies of its fittest solutions to other islands, where they replace the least fit
+    solutions. The topology decides who sends to whom: "ring" sends to the next island, "full" to all other
+    islands, and "random" to one other island picked anew at every migration.
+    """
+    TOPOLOGIES = ("ring", "full", "random")
+
+    def __init__(self, labyrinth, initial_coords: Tuple[int, int], end: Tuple[int, int], islands: int,
+                 population_size: int, generations: int, mutation_rate: float, migration_interval: int = 5,
+                 migration_size: int = 2, topology: str = "ring", rollout_backend: str = "python",
+                 seed: Optional[int] = None):
+        """Initializes an IslandModel object.
+
+        Args:
+        - labyrinth: The labyrinth object representing the maze.
+        - initial_coords (Tuple[int, int]): Initial coordinates.
+        - end (Tuple[int, int]): Final coordinates.
+        - islands (int): The number of islands, each running in its own process.
+        - population_size (int): The size of the population of every island.
+        - generations (int): The number of generations every island evolves at most.
+        - mutation_rate (float): The initial probability of mutation on every island.
+        - migration_interval (int): The number of generations between two migrations.
+        - migration_size (int): The number of solutions every island sends at each migration.
+        - topology (str): Which islands send to which, one of TOPOLOGIES.
+        - rollout_backend (str): The rollout backend of the islands.
+        - seed (Optional[int]): The seed the seeds of the islands and of the migrations are derived from.
+        """
+        if topology not in self.TOPOLOGIES:
+            raise ValueError(f"Unknown topology {topology!r}, expected one of {self.TOPOLOGIES}")
+        self.labyrinth = labyrinth
+        self.init = initial_coords
+        self.end = end
+        self.islands = islands
+        self.population_size = population_size
+        self.generations = generations
+        self.mutation_rate = mutation_rate
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.topology = topology
+        self.rollout_backend = rollout_backend
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.random = random.Random(self.seed)
+        self.history: List[List[Dict]] = [[] for _ in range(islands)]
+        self.best_path: Optional[List[Tuple[int, int]]] = None
+        self.best_fitness: float = 0
+        self.found_solution: bool = False
+
+    def _destinations(self, island: int) -> List[int]:
+        """Returns the islands an island sends its emigrants to in the current migration.
+        """
+        others = [other for other in range(self.islands) if other != island]
+        if not others:
+            return []
+        if self.topology == "ring":
+            return [(island + 1) % self.islands]
+        if self.topology == "full":
+            return others
+        return [self.random.choice(others)]
+
+    def run(self) -> List[Tuple[int, int]]:
+        """Runs all islands until one finds a solution or all of them have used up their generations.
+
+        The statistics every island reports after each epoch are appended to history.
+
+        Returns:
+        - List[Tuple[int, int]]: The path of the fittest solution found on any island.
+        """
+        grid = np.ascontiguousarray(self.labyrinth.get_labyrinth(), dtype=bool)
+        distances = DistanceField(self.labyrinth, self.end).get_distances()
+        blocks = (share_array(grid), share_array(distances))
+        island_seeds = np.random.SeedSequence(self.seed).generate_state(self.islands, np.uint64).tolist()
+        connections, processes = [], []
+        try:
+            for island in range(self.islands):
+                parent_end, child_end = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_island_main, daemon=True,
+                    args=(child_end, blocks[0].name, blocks[1].name, grid.shape, self.init, self.end,
+                          self.generations, self.population_size, self.mutation_rate, self.rollout_backend,
+                          island_seeds[island]))
+                process.start()
+                child_end.close()
+                connections.append(parent_end)
+                processes.append(process)
+
+            immigrants: List[List[List[Tuple[int, int]]]] = [[] for _ in range(self.islands)]
+            while True:
+                for island, connection in enumerate(connections):
+                    connection.send((immigrants[island], self.migration_interval, self.migration_size))
+                immigrants = [[] for _ in range(self.islands)]
+                finished = True
+                for island, connection in enumerate(connections):
+                    stats, best_path, emigrants = connection.recv()
+                    self.history[island].append(stats)
+                    if self.best_path is None or stats["max_fitness"] > self.best_fitness:
+                        self.best_path, self.best_fitness = best_path, stats["max_fitness"]
+                    self.found_solution = self.found_solution or stats["found_solution"]
+                    finished = finished and stats["done"]
+                    for destination in self._destinations(island):
+                        immigrants[destination].extend(emigrants)
+                if finished or self.found_solution:
+                    break
+            for connection in connections:
+                connection.send(None)
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return self.best_path
@@ -0,0 +1,268 @@
+# ------------------------------- IMPORTS ---------------------------------------------------------#
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Checkpoint import maze_hash
+from GALabyrinthSolver import GALabyrinthSolver
+from LabyrinthGenerator import LabyrinthGenerator
+from ParallelEvaluator import SharedLabyrinth
+
+# Solves labyrinths on a pool of worker processes and remembers every result on disk. A job is identified by
+# a hash of its labyrinth grid and of everything else that decides its outcome, so a job that was solved
+# before is answered from the cache and a job that is already being solved is only solved once.
+
+
+class SolveJob:
+    """A labyrinth to solve together with all parameters of the genetic algorithm.
+    """
+
+    def __init__(self, grid: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int], generations: int,
+                 population_size: int, mutation_rate: float, seed: int, rollout_backend: str = "python",
+                 selection: str = "tournament"):
+        """Initializes a SolveJob object.
+
+        Args:
+        - grid (np.ndarray): The passability grid of the labyrinth.
+        - start (Tuple[int, int]): Initial coordinates.
+        - goal (Tuple[int, int]): Final coordinates.
+        - generations (int): The maximum number of generations.
+        - population_size (int): The size of the population.
+        - mutation_rate (float): The initial probability of mutation.
+        - seed (int): The seed of the genetic algorithm. The same job with the same seed gives the same result.
+        - rollout_backend (str): The rollout backend of the solver.
+        - selection (str): The parent selection strategy of the solver.
+        """
+        self.grid = np.ascontiguousarray(grid, dtype=bool)
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.generations = generations
+        self.population_size = population_size
+        self.mutation_rate = mutation_rate
+        self.seed = seed
+        self.rollout_backend = rollout_backend
+        self.selection = selection
+
+    def parameters(self) -> Dict:
+        """Returns everything but the grid that decides the outcome of the job.
+        """
+        return {"start": list(self.start), "goal": list(self.goal), "generations": self.generations,
+                "population_size": self.population_size, "mutation_rate": self.mutation_rate, "seed": self.seed,
+                "rollout_backend": self.rollout_backend, "selection": self.selection}
+
+    def key(self) -> str:
+        """Returns the content hash of the job, the same for every job that is bound to give the same result.
+        """
+        digest = hashlib.sha256(maze_hash(self.grid))
+        digest.update(json.dumps(self.parameters(), sort_keys=True).encode())
+        return digest.hexdigest()
+
+
+def solve_job(job: SolveJob) -> Dict:
+    """Runs the genetic algorithm of a job to the end.
+
+    Args:
+    - job (SolveJob): The job.
+
+    Returns:
+    - Dict: The best path, whether it reaches the goal, the best fitness, the fitness of every generation and
+      the time spent per phase and in total.
+    """
+    started = time.perf_counter()
+    random.seed(job.seed)
+    solver = GALabyrinthSolver(job.generations, job.population_size, job.mutation_rate, job.start, job.goal,
+                               SharedLabyrinth(job.grid), rollout_backend=job.rollout_backend,
+                               selection=job.selection)
+    history: List[List[float]] = []
+    timings: Dict[str, float] = {}
+    for stats in solver.run():
+        history.append([stats.generation, stats.max_fitness, stats.mean_fitness])
+        for phase, seconds in stats.timings.items():
+            timings[phase] = timings.get(phase, 0.0) + seconds
+    best = solver.population[solver.stats.best_index]
+    return {"best_path": [list(cell) for cell in best.path], "found_solution": solver.found_solution,
+            "best_fitness": solver.stats.max_fitness, "generations": solver.current_generation,
+            "history": history, "timings": timings, "elapsed": time.perf_counter() - started}
+
+
+class ResultCache:
+    """A directory of job results, one JSON file per job key, that forgets the least recently used results.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 1024):
+        """Initializes a ResultCache object, creating its directory if needed.
+
+        Args:
+        - directory (str): The directory holding the results.
+        - max_entries (int): The number of results kept; storing more removes the least recently used ones.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the result stored for a key and marks it as recently used, or None if there is none.
+        """
+        path = self._path(key)
+        with self.lock:
+            try:
+                with open(path) as result_file:
+                    result = json.load(result_file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+            os.utime(path)
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Stores the result of a key, then removes the least recently used results beyond max_entries.
+        """
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as result_file:
+            json.dump(result, result_file)
+        with self.lock:
+            os.replace(temporary_path, path)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+            if len(entries) > self.max_entries:
+                entries.sort()
+                for _, stale_path in entries[:len(entries) - self.max_entries]:
+                    if stale_path != path:
+                        os.remove(stale_path)
+
+
+class JobServer:
+    """Solves jobs on a bounded pool of worker processes, answering repeated jobs from a ResultCache.
+
+    Jobs wait in the queue of the pool until a worker is free. A job whose key is already cached is answered
+    at once; a job whose key is being solved right now gets the future of that run instead of a new one.
+    """
+
+    def __init__(self, cache_dir: str, workers: Optional[int] = None, max_cache_entries: int = 1024):
+        """Initializes a JobServer object and starts its worker processes.
+
+        Args:
+        - cache_dir (str): The directory of the result cache.
+        - workers (Optional[int]): The number of worker processes. Defaults to the number of CPUs.
+        - max_cache_entries (int): The number of results the cache keeps.
+        """
+        self.cache = ResultCache(cache_dir, max_cache_entries)
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.in_flight: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.solved = 0
+
+    def __enter__(self) -> "JobServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, job: SolveJob) -> Future:
+        """Queues a job, unless its result is cached or already on its way.
+
+        Args:
+        - job (SolveJob): The job.
+
+        Returns:
+        - Future: A future resolving to the result dictionary of `solve_job`.
+        """
+        key = job.key()
+        with self.lock:
+            running = self.in_flight.get(key)
+            if running is not None:
+                self.coalesced += 1
+                return running
+            result = self.cache.get(key)
+            if result is not None:
+                self.hits += 1
+                future = Future()
+                future.set_result(result)
+                return future
+            future = self.executor.submit(solve_job, job)
+            self.in_flight[key] = future
+            self.solved += 1
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: Future) -> None:
+        """Stores the result of a finished job and forgets that it is running.
+        """
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+        with self.lock:
+            self.in_flight.pop(key, None)
+
+    def close(self) -> None:
+        """Waits for the queued jobs to finish and stops the worker processes.
+        """
+        self.executor.shutdown(wait=True)
+
+
+# ------------------------------- JOB FILE MODE --------------------------------------------------- #
+
+def job_from_row(row: Dict) -> SolveJob:
+    """Builds a job from one line of a job file.
+
+    The labyrinth is either a saved labyrinth file under "maze", or generated from "size", "maze_seed" and
+    "algorithm". The start defaults to (1, 1) and the goal to the opposite corner.
+
+    Args:
+    - row (Dict): The job description.
+
+    Returns:
+    - SolveJob: The job.
+    """
+    if "maze" in row:
+        labyrinth = LabyrinthGenerator.load(row["maze"])
+    else:
+        labyrinth = LabyrinthGenerator(row["size"], row["size"], row.get("algorithm", "frontier"),
+                                       seed=row.get("maze_seed", 0)).generate()
+    return SolveJob(labyrinth.get_labyrinth(), row.get("start", (1, 1)),
+                    row.get("goal", (labyrinth.height - 2, labyrinth.width - 2)), row.get("generations", 30),
+                    row.get("population", 80), row.get("mutation_rate", 0.04), row.get("seed", 0),
+                    row.get("backend", "python"), row.get("selection", "tournament"))
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Solve the jobs of a JSON lines file on a worker pool, caching results by labyrinth and "
+                    "parameters.")
+    parser.add_argument("jobs", nargs="?", default="-", help="file with one job per line, '-' for stdin")
+    parser.add_argument("--cache-dir", default=".labyrinth-cache", help="directory of the result cache")
+    parser.add_argument("--max-cache-entries", type=int, default=1024, help="number of results to keep")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    job_file = sys.stdin if arguments.jobs == "-" else open(arguments.jobs)
+    with JobServer(arguments.cache_dir, arguments.workers, arguments.max_cache_entries) as server:
+        futures = [server.submit(job_from_row(json.loads(line))) for line in job_file if line.strip()]
+        for index, future in enumerate(futures):
+            result = future.result()
+            print(json.dumps({"job": index, "found_solution": result["found_solution"],
+                              "best_fitness": result["best_fitness"], "generations": result["generations"],
+                              "elapsed": result["elapsed"], "path_length": len(result["best_path"])}))
+            sys.stdout.flush()
+        print(json.dumps({"solved": server.solved, "cache_hits": server.hits, "coalesced": server.coalesced}),
+              file=sys.stderr)
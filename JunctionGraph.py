@@ -0,0 +1,145 @@
+import heapq
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from helperFunctions import find_path, manhattan_distance
+from PathFinder import NoPathError
+
+
+class JunctionGraph:
+    """The skeleton of a labyrinth: its junctions and dead ends, connected by the corridors between them.
+
+    Every passable cell that does not have exactly two passable neighbors is a node, and so is every pinned
+    cell, such as the start and the goal. All other cells lie inside a corridor, where there is only one way
+    on. Corridors are walked once, the first time they are needed, and remembered as the list of cells from
+    the first step up to and including the node at their far end. The graph rebuilds itself whenever the
+    labyrinth reports that its grid has changed.
+
+    The solver's "corridor" backend only uses `neighbors` and `corridor`. `find_path` is provided for callers
+    outside the solver, which seeds its best path from the DistanceField instead.
+    """
+
+    def __init__(self, labyrinth, pins: Iterable[Tuple[int, int]] = ()):
+        """Initializes a JunctionGraph object for the given labyrinth.
+
+        Args:
+        - labyrinth: The labyrinth object representing the maze.
+        - pins (Iterable[Tuple[int, int]]): Cells that must be nodes even inside a corridor.
+        """
+        self.labyrinth = labyrinth
+        self.pins = list(pins)
+        self.version: int = -1
+        self.corridors: Dict[Tuple[Tuple[int, int], Tuple[int, int]], Tuple[Tuple[int, int], ...]] = {}
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Finds the nodes again if the labyrinth grid changed since they were last found.
+        """
+        if self.version == self.labyrinth.version:
+            return
+        grid = np.asarray(self.labyrinth.get_labyrinth(), dtype=bool)
+        self.height, self.width = grid.shape
+        padded = np.pad(grid, 1).astype(np.int8)
+        degrees = padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
+        nodes = grid & (degrees != 2)
+        for y, x in self.pins:
+            nodes[y, x] = grid[y, x]
+        self.passable = grid.tobytes()
+        self.nodes = nodes.tobytes()
+        self.corridors.clear()
+        self.version = self.labyrinth.version
+
+    def node_count(self) -> int:
+        """Returns the number of junctions, dead ends and pinned cells.
+        """
+        self._refresh()
+        return self.nodes.count(1)
+
+    def is_node(self, cell: Tuple[int, int]) -> bool:
+        """Returns whether a cell is a junction, a dead end or a pinned cell.
+        """
+        self._refresh()
+        return bool(self.nodes[cell[0] * self.width + cell[1]])
+
+    def neighbors(self, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Returns the passable cells next to a cell.
+        """
+        self._refresh()
+        y, x = cell
+        width, passable = self.width, self.passable
+        return [(ny, nx) for ny, nx in ((y, x + 1), (y + 1, x), (y, x - 1), (y - 1, x))
+                if 0 <= ny < self.height and 0 <= nx < width and passable[ny * width + nx]]
+
+    def corridor(self, cell: Tuple[int, int], step: Tuple[int, int]) -> Tuple[Tuple[int, int], ...]:
+        """Returns the cells from a step away from a cell up to the next node in that direction.
+
+        Args:
+        - cell (Tuple[int, int]): The cell the corridor starts from. It does not need to be a node.
+        - step (Tuple[int, int]): The passable neighbor of the cell to walk into.
+
+        Returns:
+        - Tuple[Tuple[int, int], ...]: The cells of the corridor, the step first and the node it ends in last.
+        """
+        self._refresh()
+        corridor = self.corridors.get((cell, step))
+        if corridor is not None:
+            return corridor
+        height, width, passable, nodes = self.height, self.width, self.passable, self.nodes
+        cells = [step]
+        previous, (y, x) = cell, step
+        while not nodes[y * width + x] and (y, x) != cell:
+            # Inside a corridor there are exactly two passable neighbors, and one of them is behind us.
+            for ny, nx in ((y, x + 1), (y + 1, x), (y, x - 1), (y - 1, x)):
+                if (ny, nx) != previous and 0 <= ny < height and 0 <= nx < width and passable[ny * width + nx]:
+                    break
+            previous, (y, x) = (y, x), (ny, nx)
+            cells.append((y, x))
+        corridor = tuple(cells)
+        if nodes[cell[0] * width + cell[1]]:
+            self.corridors[(cell, step)] = corridor
+        return corridor
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Finds a shortest path with A* on the nodes of the graph, weighting every corridor by its length.
+
+        If the start or the goal is not a node, this falls back to `helperFunctions.find_path` on the cells.
+
+        Args:
+        - start (Tuple[int, int]): The cell to start from.
+        - goal (Tuple[int, int]): The cell to reach.
+
+        Returns:
+        - List[Tuple[int, int]]: The cells of the path from start to goal.
+
+        Raises:
+        - NoPathError: If the goal cannot be reached from the start.
+        """
+        if not (self.is_node(start) and self.is_node(goal)):
+            return find_path(start, goal, self.labyrinth.get_labyrinth())
+        g_scores = {start: 0}
+        came_from = {}
+        closed_set = set()
+        open_set = [(manhattan_distance(start[1], start[0], goal[1], goal[0]), 0, start)]
+        while open_set:
+            _, g_score, current = heapq.heappop(open_set)
+            if current == goal:
+                corridors = []
+                while current in came_from:
+                    current, corridor = came_from[current]
+                    corridors.append(corridor)
+                return [start] + [cell for corridor in reversed(corridors) for cell in corridor]
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            for step in self.neighbors(current):
+                corridor = self.corridor(current, step)
+                node = corridor[-1]
+                tentative_g_score = g_score + len(corridor)
+                if node not in closed_set and tentative_g_score < g_scores.get(node, tentative_g_score + 1):
+                    g_scores[node] = tentative_g_score
+                    came_from[node] = (current, corridor)
+                    heapq.heappush(open_set, (tentative_g_score + manhattan_distance(node[1], node[0], goal[1],
+                                                                                     goal[0]),
+                                              tentative_g_score, node))
+        raise NoPathError(start, goal)
@@ -1,13 +1,19 @@
-from typing import Tuple
+from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
 import pygame
 
 from LabyrinthGenerator import LabyrinthGenerator
+from PathPalette import PathPalette
 
 
 class LabyrinthDisplay:
     """A class for displaying a labyrinth generated by a `LabyrinthGenerator`.
+
+    Drawing only changes the window surface and remembers the changed area. Nothing reaches the screen
+    until `present` is called, which updates all changed areas at once.
     """
+    FULL_UPDATE_THRESHOLD = 256
     START_COLOR = (0, 255, 0)
     END_COLOR = (0, 255, 0)
     width: int = 100
@@ -15,8 +21,9 @@ class LabyrinthDisplay:
     cell_size: int = 40
     title: str = ""
     display: pygame.Surface = None
-    pixelArray: pygame.PixelArray = None
     maze: LabyrinthGenerator = None
+    dirty_rects: List[pygame.Rect] = []
+    maze_surface: pygame.Surface = None
 
     def __init__(self, title: str, width: int, height: int, block_size: int):
         """Initializes a new LabyrinthDisplay object with the specified parameters.
@@ -34,7 +41,10 @@ class LabyrinthDisplay:
         self.height = self.maze.height * self.cell_size
         self.display = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption(title)
-        self.pixelArray = pygame.PixelArray(self.display)
+        self.dirty_rects = []
+        self._maze_pixels = None
+        self._maze_version = -1
+        self.path_colors = PathPalette()
 
     def _draw_pixel(self, x_coordinate: int, y_coordinate: int, color: Tuple[int, int, int]):
         """Draws a single pixel with the specified color at the specified coordinates.
@@ -45,7 +55,8 @@ class LabyrinthDisplay:
         - color: A tuple of three integers representing the RGB color value of the pixel.
         """
         if 0 <= x_coordinate < self.width and 0 <= y_coordinate < self.height:
-            self.pixelArray[x_coordinate, y_coordinate] = color
+            self.display.set_at((x_coordinate, y_coordinate), color)
+            self.dirty_rects.append(pygame.Rect(x_coordinate, y_coordinate, 1, 1))
 
     def draw_rectangle(self, sx: int, sy: int, width: int, height: int, color: Tuple[int, int, int]):
         """Draws a rectangle with the specified dimensions and color.
@@ -57,26 +68,95 @@ class LabyrinthDisplay:
         - height: An integer representing the height of the rectangle (in pixels).
         - color: A tuple of three integers representing the RGB color value of the rectangle.
         """
-        pygame.draw.rect(self.display, color, (sx, sy, width, height))
-        pygame.display.update()
+        self.dirty_rects.append(pygame.draw.rect(self.display, color, (sx, sy, width, height)))
+
+    def present(self):
+        """Shows everything drawn since the last call on the screen, with a single display update.
+        """
+        if not self.dirty_rects:
+            return
+        if len(self.dirty_rects) > self.FULL_UPDATE_THRESHOLD:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.dirty_rects)
+        self.dirty_rects.clear()
+
+    def _refresh_maze_surface(self):
+        """Renders the labyrinth into an off-screen surface, if it changed since it was last rendered.
+        """
+        if self._maze_version == self.maze.version:
+            return
+        grid = self.maze.get_labyrinth()
+        self._maze_pixels = np.where(grid[:, :, None], np.uint8(255), np.uint8(0)).repeat(3, axis=2)
+        self.maze_surface = self._scale(self._maze_pixels)
+        self._maze_version = self.maze.version
+
+    def _scale(self, pixels: np.ndarray) -> pygame.Surface:
+        """Turns an image with one pixel per cell into a surface the size of the window.
+
+        Args:
+        - pixels: An array of shape (height, width, 3) holding the RGB color of every cell.
+        """
+        surface = pygame.surfarray.make_surface(pixels.swapaxes(0, 1))
+        return pygame.transform.scale(surface, (self.width, self.height))
+
+    def render_labyrinth(self):
+        """Draws the whole labyrinth from its pre-rendered surface.
+        """
+        self._refresh_maze_surface()
+        self.dirty_rects.append(self.display.blit(self.maze_surface, (0, 0)))
 
-    def draw_labyrinth(self):
+    def draw_paths(self, paths: Iterable, colors: Optional[Iterable] = None):
+        """Draws the labyrinth with paths on top, as a single image.
+
+        Args:
+        - paths: The paths to draw, each a sequence of (y, x) cells.
+        - colors: The color of every path. Only the RGB part of the color is used. Defaults to the colors of the
+          `path_colors` palette, so the path at the same position keeps its color from one drawing to the next.
+        """
+        if colors is None:
+            paths = list(paths)
+            colors = self.path_colors(len(paths))
+        self._refresh_maze_surface()
+        pixels = self._maze_pixels.copy()
+        for path, color in zip(paths, colors):
+            cells = np.array(path)
+            pixels[cells[:, 0], cells[:, 1]] = color[:3]
+        self.dirty_rects.append(self.display.blit(self._scale(pixels), (0, 0)))
+
+    def draw_population(self, population: Iterable):
+        """Draws the labyrinth with the paths of a population on top, as a single image.
+
+        Args:
+        - population: The solutions whose paths are drawn, each in its own color.
+        """
+        self.draw_paths([s.path for s in population])
+
+    def draw_labyrinth(self, steps_per_frame: int = 1):
         """Draws the labyrinth on the screen using the current LabyrinthGenerator object.
+
+        Args:
+        - steps_per_frame: How many generation steps to take before the screen is updated.
         """
         generating_maze = True
+        cells_to_draw = set(self.maze.get_cells_to_draw())
         while generating_maze:
-            pygame.time.Clock()
             for game_event in pygame.event.get():
                 if game_event.type == pygame.QUIT:
                     generating_maze = False
                     break
-            for y_coordinate, x_coordinate in self.maze.get_cells_to_draw():
+            for y_coordinate, x_coordinate in cells_to_draw:
                 self.draw_rectangle(x_coordinate * self.cell_size, y_coordinate * self.cell_size,
                                     self.cell_size, self.cell_size,
                                     self.maze.get_cell_color(y_coordinate, x_coordinate))
             self.draw_rectangle(615, 615, self.cell_size,
                                 self.cell_size, (124, 252, 0))
+            self.present()
             if len(self.maze.frontier_cells) == 0:
                 break
-            pygame.display.update()
-            self.maze.work_one_step()
+            cells_to_draw = set()
+            for _ in range(steps_per_frame):
+                self.maze.work_one_step()
+                cells_to_draw.update(self.maze.get_cells_to_draw())
+                if len(self.maze.frontier_cells) == 0:
+                    break
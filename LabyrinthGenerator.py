@@ -1,22 +1,44 @@
+import mmap
 import random
-from random import randint
-from typing import Tuple, List, Any
+import struct
+from typing import Tuple, List, Any, Optional, Iterator
+
+import numpy as np
+
+from PackedGrid import PackedGrid
 
 
 class LabyrinthGenerator:
-    """The LabyrinthGenerator class generates a labyrinth using the depth-first search algorithm.
+    """The LabyrinthGenerator class generates a perfect labyrinth, either step by step or all at once.
+
+    Cells with odd row and column are rooms, every other cell is a wall until a passage is carved through it.
     """
 
     WALL_COLOR, PATH_COLOR = (0, 0, 0), (255, 255, 255)
     DIRECTIONS = [(0, 2), (0, -2), (-2, 0), (2, 0)]
+    ALGORITHMS = ("frontier", "backtracker", "kruskal", "eller")
+
+    # Maze files: this header, then one bit per cell (see PackedGrid), then optionally the int32 distance
+    # of every cell to the goal, starting at the next multiple of four bytes.
+    FILE_MAGIC, FILE_VERSION = b"LABY", 1
+    FILE_HEADER = struct.Struct("<4sHHIIQIIII")  # magic, version, flags, height, width, seed, start, goal
+    FILE_HAS_DISTANCES = 1
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, algorithm: str = "frontier", seed: Optional[int] = None):
         """Initializes a LabyrinthGenerator object with the given width and height.
 
         Args:
         - width (int): The width of the labyrinth. If even, it will be increased by 1.
         - height (int): The height of the labyrinth. If even, it will be increased by 1.
+        - algorithm (str): How the labyrinth is carved: "frontier" grows it from randomly chosen frontier
+          cells (Prim), "backtracker" is an iterative randomized depth-first search, "kruskal" removes
+          walls in random order while joining disconnected regions with a union-find, and "eller" carves one
+          row at a time, see `generate_to_file`.
+        - seed (Optional[int]): The seed of the labyrinth. Defaults to a seed drawn from the random module.
         """
+        if algorithm not in LabyrinthGenerator.ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {LabyrinthGenerator.ALGORITHMS}")
+
         if width % 2 == 0:
             width += 1
         if height % 2 == 0:
@@ -24,9 +46,17 @@ class LabyrinthGenerator:
 
         self.width = width
         self.height = height
+        self.algorithm = algorithm
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.random = random.Random(self.seed)
+
+        # Only known for labyrinths loaded from a file.
+        self.start_position: Optional[Tuple[int, int]] = None
+        self.goal_position: Optional[Tuple[int, int]] = None
+        self.stored_distances: Optional[np.ndarray] = None
 
-        start_x, start_y = randint(
-            1, self.width - 2), randint(1, self.height - 2)
+        start_x, start_y = self.random.randint(
+            1, self.width - 2), self.random.randint(1, self.height - 2)
         if not start_x % 2:
             start_x += 1
         if not start_y % 2:
@@ -38,12 +68,13 @@ class LabyrinthGenerator:
 
         self.cells_to_draw = set()
 
-        self.labyrinth = [
-            [LabyrinthGenerator.WALL_COLOR if y % 2 + x % 2 < 2 else LabyrinthGenerator.PATH_COLOR for x in
-             range(self.width)]
-            for y in
-            range(self.height)]
+        self.version = 0
 
+        # One byte per cell, True where the cell is passable. Colors are only produced on request.
+        self.grid = np.zeros((self.height, self.width), dtype=bool)
+        self.grid[1::2, 1::2] = True
+
+        self.start = (start_y, start_x)
         self.visited_cells.add((start_y, start_x))
         self.cells_to_draw.add((start_y, start_x))
         self._add_unvisited_adjacent_cells(start_y, start_x)
@@ -73,7 +104,7 @@ class LabyrinthGenerator:
             neighbor = (row + neighbor_offset[0], column + neighbor_offset[1])
             if self._within_bounds(neighbor[0], neighbor[
                 1]) and neighbor not in self.visited_cells and neighbor not in self.frontier_cells and \
-                    self.labyrinth[neighbor[0]][neighbor[1]] == LabyrinthGenerator.PATH_COLOR:
+                    self.grid[neighbor]:
                 self.frontier_cells.add(neighbor)
 
     def _get_visited_adjacent_cells(self, y: int, x: int) -> List[Tuple[int, int]]:
@@ -101,13 +132,13 @@ class LabyrinthGenerator:
         """
         return 0 <= y < self.height and 0 <= x < self.width
 
-    def get_labyrinth(self) -> List[List[Tuple[int, int, int]]]:
-        """Returns the labyrinth as a list of lists of tuples, where each tuple is an RGB color code.
+    def get_labyrinth(self) -> np.ndarray:
+        """Returns the labyrinth as a boolean array of shape (height, width) that is True for passable cells.
 
         Returns:
-        - List[List[Tuple[int, int, int]]]: The labyrinth as a list of RGB color code tuples.
+        - np.ndarray: The passability grid of the labyrinth.
         """
-        return self.labyrinth
+        return self.grid
 
     def get_frontier_cells(self) -> set[Any]:
         """Returns the frontier_cells set.
@@ -135,7 +166,7 @@ class LabyrinthGenerator:
         Returns:
         - Tuple[int, int, int]: The RGB color code of the cell at the given row and column indices.
         """
-        return self.labyrinth[y][x]
+        return LabyrinthGenerator.PATH_COLOR if self.grid[y, x] else LabyrinthGenerator.WALL_COLOR
 
     def work_one_step(self):
         """Performs one step of the labyrinth generation algorithm.
@@ -144,28 +175,356 @@ class LabyrinthGenerator:
         The connected cells are added to the visited_cells set.
 
         Unvisited adjacent cells of the newly connected cell are added to the frontier_cells set.
+
+        Only the "frontier" algorithm can be run step by step. For the other algorithms, the first step
+        generates the whole labyrinth and marks all of its passable cells to be drawn.
         """
         self.cells_to_draw.clear()
         frontier_length = len(self.frontier_cells)
         if frontier_length == 0:
             return
+        if self.algorithm != "frontier":
+            self.generate()
+            self.cells_to_draw.update(zip(*np.nonzero(self.grid)))
+            return
         cell = self.frontier_cells.pop()
         nearby = self._get_visited_adjacent_cells(cell[0], cell[1])
-        in_maze = random.choice(nearby)
+        in_maze = self.random.choice(nearby)
 
         dy, dx = LabyrinthGenerator._clamp(
             cell[0] - in_maze[0], -1, 1), LabyrinthGenerator._clamp(cell[1] - in_maze[1], -1, 1)
 
         if dy != 0:
-            self.labyrinth[in_maze[0] + dy][in_maze[1]
-                                            ] = LabyrinthGenerator.PATH_COLOR
+            self.grid[in_maze[0] + dy, in_maze[1]] = True
             self.cells_to_draw.add((in_maze[0] + dy, in_maze[1]))
         if dx != 0:
-            self.labyrinth[in_maze[0]][in_maze[1] +
-                                       dx] = LabyrinthGenerator.PATH_COLOR
+            self.grid[in_maze[0], in_maze[1] + dx] = True
             self.cells_to_draw.add((in_maze[0], in_maze[1] + dx))
 
         self.visited_cells.add(cell)
         self.cells_to_draw.add(cell)
+        self.version += 1
 
         self._add_unvisited_adjacent_cells(cell[0], cell[1])
+
+    def generate(self) -> "LabyrinthGenerator":
+        """Generates the whole labyrinth at once with the chosen algorithm.
+
+        Nothing is recorded for drawing, and the cost is linear in the number of cells. Passages carved
+        before, by work_one_step or an earlier call, are walled up again first, so the result is always a
+        single spanning tree. Afterwards the frontier_cells and visited_cells sets are empty and work_one_step
+        does nothing.
+
+        Returns:
+        - LabyrinthGenerator: The labyrinth itself, now finished.
+        """
+        rooms = np.zeros((self.height, self.width), dtype=bool)
+        rooms[1::2, 1::2] = True
+        passable = bytearray(rooms.tobytes())
+        getattr(self, f"_generate_{self.algorithm}")(passable)
+        self.grid = np.frombuffer(passable, dtype=bool).reshape(self.height, self.width).copy()
+        self.frontier_cells = set()
+        self.visited_cells = set()
+        self.cells_to_draw.clear()
+        self.version += 1
+        return self
+
+    def _room_neighbors(self, room: int) -> List[Tuple[int, int]]:
+        """Returns the rooms next to a room together with the wall between them, as flat grid indices.
+
+        Args:
+        - room (int): The flat index of the room.
+
+        Returns:
+        - List[Tuple[int, int]]: The flat index of each neighboring room and of the wall in between.
+        """
+        width = self.width
+        y, x = divmod(room, width)
+        neighbors = []
+        if x + 2 < width:
+            neighbors.append((room + 2, room + 1))
+        if x > 1:
+            neighbors.append((room - 2, room - 1))
+        if y + 2 < self.height:
+            neighbors.append((room + 2 * width, room + width))
+        if y > 1:
+            neighbors.append((room - 2 * width, room - width))
+        return neighbors
+
+    def _generate_frontier(self, passable: bytearray) -> None:
+        """Carves the labyrinth by repeatedly connecting a random frontier room to a random visited neighbor.
+
+        Args:
+        - passable (bytearray): The flat passability grid to carve into.
+        """
+        choice, randrange = self.random.choice, self.random.randrange
+        visited = bytearray(len(passable))
+        in_frontier = bytearray(len(passable))
+        start = self.start[0] * self.width + self.start[1]
+        visited[start] = 1
+        frontier = []
+        for neighbor, _ in self._room_neighbors(start):
+            in_frontier[neighbor] = 1
+            frontier.append(neighbor)
+        while frontier:
+            index = randrange(len(frontier))
+            frontier[index], frontier[-1] = frontier[-1], frontier[index]
+            room = frontier.pop()
+            neighbors = self._room_neighbors(room)
+            _, wall = choice([n for n in neighbors if visited[n[0]]])
+            passable[wall] = 1
+            visited[room] = 1
+            for neighbor, _ in neighbors:
+                if not visited[neighbor] and not in_frontier[neighbor]:
+                    in_frontier[neighbor] = 1
+                    frontier.append(neighbor)
+
+    def _generate_backtracker(self, passable: bytearray) -> None:
+        """Carves the labyrinth with a randomized depth-first search that keeps its own stack.
+
+        Args:
+        - passable (bytearray): The flat passability grid to carve into.
+        """
+        choice = self.random.choice
+        visited = bytearray(len(passable))
+        start = self.start[0] * self.width + self.start[1]
+        visited[start] = 1
+        stack = [start]
+        while stack:
+            options = [n for n in self._room_neighbors(stack[-1]) if not visited[n[0]]]
+            if not options:
+                stack.pop()
+                continue
+            room, wall = choice(options)
+            passable[wall] = 1
+            visited[room] = 1
+            stack.append(room)
+
+    def _generate_kruskal(self, passable: bytearray) -> None:
+        """Carves the labyrinth by removing walls in random order if they separate two unconnected regions.
+
+        Args:
+        - passable (bytearray): The flat passability grid to carve into.
+        """
+        width = self.width
+        walls = [(room, room + 1, room + 2) for y in range(1, self.height, 2)
+                 for room in range(y * width + 1, y * width + width - 2, 2)]
+        walls += [(room, room + width, room + 2 * width) for y in range(1, self.height - 2, 2)
+                  for room in range(y * width + 1, y * width + width, 2)]
+        self.random.shuffle(walls)
+
+        # Union-find over flat room indices, with path halving and union by size.
+        parent = list(range(len(passable)))
+        size = [1] * len(passable)
+
+        def find(room: int) -> int:
+            while parent[room] != room:
+                parent[room] = parent[parent[room]]
+                room = parent[room]
+            return room
+
+        for first, wall, second in walls:
+            first, second = find(first), find(second)
+            if first != second:
+                if size[first] < size[second]:
+                    first, second = second, first
+                parent[second] = first
+                size[first] += size[second]
+                passable[wall] = 1
+
+    def _generate_eller(self, passable: bytearray) -> None:
+        """Carves the labyrinth row by row with Eller's algorithm.
+
+        Args:
+        - passable (bytearray): The flat passability grid to carve into.
+        """
+        # A fresh generator from the seed, so the result is the same as from generate_to_file with that seed.
+        width = self.width
+        for y, row in enumerate(LabyrinthGenerator._eller_rows(width, self.height, random.Random(self.seed))):
+            passable[y * width:(y + 1) * width] = row
+
+    @staticmethod
+    def _eller_rows(width: int, height: int, rng: random.Random) -> Iterator[bytearray]:
+        """Generates a perfect labyrinth with Eller's algorithm, one row of cells at a time.
+
+        Only the row of rooms being carved is remembered, with the region every room belongs to. Rooms next to
+        each other are joined at random if they are in different regions, then every region carves at least
+        one passage down so that it stays connected to the rest. The last row of rooms joins all regions left.
+
+        Args:
+        - width (int): The odd width of the labyrinth.
+        - height (int): The odd height of the labyrinth.
+        - rng (random.Random): The random generator.
+
+        Yields:
+        - bytearray: Every row of the grid from top to bottom, one byte per cell, 1 where passable.
+        """
+        rooms, room_rows = (width - 1) // 2, (height - 1) // 2
+        random_value, randrange = rng.random, rng.randrange
+        yield bytearray(width)
+        regions = list(range(rooms))
+        next_region = rooms
+        for room_row in range(room_rows):
+            last = room_row == room_rows - 1
+            row = bytearray(width)
+            row[1:width - 1:2] = b"\x01" * rooms
+
+            # Union-find over the regions of this row only, so it never grows beyond the row.
+            parent = {}
+
+            def find(region: int) -> int:
+                while region in parent:
+                    grandparent = parent[region]
+                    if grandparent in parent:
+                        parent[region] = parent[grandparent]
+                    region = grandparent
+                return region
+
+            for room in range(rooms - 1):
+                left, right = find(regions[room]), find(regions[room + 1])
+                if left != right and (last or random_value() < 0.5):
+                    parent[right] = left
+                    row[2 * room + 2] = 1
+            yield row
+            if last:
+                break
+
+            members = {}
+            for room in range(rooms):
+                members.setdefault(find(regions[room]), []).append(room)
+            below = bytearray(width)
+            new_regions = list(range(next_region, next_region + rooms))
+            next_region += rooms
+            for region, region_rooms in members.items():
+                carved = [room for room in region_rooms if random_value() < 0.5]
+                if not carved:
+                    carved = [region_rooms[randrange(len(region_rooms))]]
+                for room in carved:
+                    below[2 * room + 1] = 1
+                    new_regions[room] = region
+            regions = new_regions
+            yield below
+        yield bytearray(width)
+
+    @staticmethod
+    def _pack_header(flags: int, height: int, width: int, seed: int, start: Tuple[int, int],
+                     goal: Tuple[int, int]) -> bytes:
+        if not 0 <= seed < 2 ** 64:
+            raise ValueError(f"Only seeds from 0 to 2**64 - 1 can be saved, not {seed}")
+        return LabyrinthGenerator.FILE_HEADER.pack(LabyrinthGenerator.FILE_MAGIC, LabyrinthGenerator.FILE_VERSION,
+                                                   flags, height, width, seed, *start, *goal)
+
+    @classmethod
+    def generate_to_file(cls, path: str, width: int, height: int, seed: Optional[int] = None,
+                         start: Tuple[int, int] = (1, 1), goal: Optional[Tuple[int, int]] = None,
+                         lazy: bool = True) -> "LabyrinthGenerator":
+        """Generates a labyrinth with Eller's algorithm straight into a file in the format of `save`.
+
+        Rows are packed and written as soon as they are carved, so memory stays proportional to the width and
+        labyrinths far larger than the memory can be generated. Solving them is another matter: computing a
+        DistanceField and the "numpy" rollout backend unpack the whole grid to one byte per cell, and the
+        distances take four bytes per cell more, so a 100,000 by 100,000 labyrinth needs about 50 GB to solve.
+
+        Args:
+        - path (str): The file to write.
+        - width (int): The width of the labyrinth. If even, it will be increased by 1.
+        - height (int): The height of the labyrinth. If even, it will be increased by 1.
+        - seed (Optional[int]): The seed of the labyrinth. Defaults to a seed drawn from the random module.
+        - start (Tuple[int, int]): The starting position to record for solvers.
+        - goal (Optional[Tuple[int, int]]): The goal to record for solvers. Defaults to the bottom right room.
+        - lazy (bool): Passed on to `load` when the written file is opened.
+
+        Returns:
+        - LabyrinthGenerator: The labyrinth, loaded from the written file.
+
+        Raises:
+        - ValueError: If the seed is negative or does not fit in 64 bits.
+        """
+        width += 1 - width % 2
+        height += 1 - height % 2
+        seed = random.getrandbits(63) if seed is None else seed
+        if goal is None:
+            goal = (height - 2, width - 2)
+        # Checked before the file is opened, so a bad seed does not leave an empty file behind.
+        header = LabyrinthGenerator._pack_header(0, height, width, seed, start, goal)
+        with open(path, "wb") as file:
+            file.write(header)
+            # Rows do not end on byte boundaries, so up to seven cells are carried over to the next row.
+            carried = np.empty(0, dtype=np.uint8)
+            for row in LabyrinthGenerator._eller_rows(width, height, random.Random(seed)):
+                cells = np.concatenate((carried, np.frombuffer(row, dtype=np.uint8)))
+                whole = len(cells) & ~7
+                file.write(np.packbits(cells[:whole], bitorder="little").tobytes())
+                carried = cells[whole:]
+            if len(carried):
+                file.write(np.packbits(carried, bitorder="little").tobytes())
+        return cls.load(path, lazy=lazy)
+
+    def save(self, path: str, start: Tuple[int, int] = (1, 1), goal: Optional[Tuple[int, int]] = None,
+             distances: Optional[np.ndarray] = None) -> None:
+        """Saves the finished labyrinth to a file, using one bit per cell.
+
+        Args:
+        - path (str): The file to write.
+        - start (Tuple[int, int]): The starting position to record for solvers.
+        - goal (Optional[Tuple[int, int]]): The goal to record for solvers. Defaults to the bottom right room.
+        - distances (Optional[np.ndarray]): The distance of every cell to the goal, stored alongside if given,
+          for example from `DistanceField.get_distances`.
+
+        Raises:
+        - ValueError: If the seed is negative or does not fit in 64 bits.
+        """
+        if goal is None:
+            goal = (self.height - 2, self.width - 2)
+        flags = LabyrinthGenerator.FILE_HAS_DISTANCES if distances is not None else 0
+        header = LabyrinthGenerator._pack_header(flags, self.height, self.width, self.seed, start, goal)
+        packed = self.grid.bits if isinstance(self.grid, PackedGrid) else PackedGrid.pack(self.grid)
+        with open(path, "wb") as file:
+            file.write(header)
+            file.write(packed.tobytes())
+            if distances is not None:
+                file.write(bytes(-file.tell() % 4))
+                file.write(np.ascontiguousarray(distances, dtype="<i4").tobytes())
+
+    @classmethod
+    def load(cls, path: str, lazy: bool = False) -> "LabyrinthGenerator":
+        """Loads a labyrinth saved with `save`, by memory-mapping the file.
+
+        The recorded start and goal end up in start_position and goal_position, and stored distances in
+        stored_distances as a read-only view of the file.
+
+        Args:
+        - path (str): The file to read.
+        - lazy (bool): If True, the grid stays a PackedGrid reading the mapped file instead of being unpacked
+          into one byte per cell. Many processes can then share one copy of the labyrinth through the page cache.
+
+        Returns:
+        - LabyrinthGenerator: The finished labyrinth.
+        """
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, height, width, seed, start_y, start_x, goal_y, goal_x = \
+            LabyrinthGenerator.FILE_HEADER.unpack_from(mapped)
+        if magic != LabyrinthGenerator.FILE_MAGIC or version != LabyrinthGenerator.FILE_VERSION:
+            raise ValueError(f"{path} is not a labyrinth file this version can read")
+        offset = LabyrinthGenerator.FILE_HEADER.size
+        packed_size = (height * width + 7) // 8
+        grid = PackedGrid(np.frombuffer(mapped, dtype=np.uint8, count=packed_size, offset=offset), height, width)
+
+        labyrinth = cls.__new__(cls)
+        labyrinth.width, labyrinth.height = width, height
+        labyrinth.algorithm = None
+        labyrinth.seed = seed
+        labyrinth.random = random.Random(seed)
+        labyrinth.start = (start_y, start_x)
+        labyrinth.frontier_cells, labyrinth.visited_cells, labyrinth.cells_to_draw = set(), set(), set()
+        labyrinth.version = 0
+        labyrinth.grid = grid if lazy else grid.unpack()
+        labyrinth.start_position = (start_y, start_x)
+        labyrinth.goal_position = (goal_y, goal_x)
+        labyrinth.stored_distances = None
+        if flags & LabyrinthGenerator.FILE_HAS_DISTANCES:
+            offset += packed_size + (-(offset + packed_size) % 4)
+            labyrinth.stored_distances = np.frombuffer(mapped, dtype="<i4", count=height * width,
+                                                       offset=offset).reshape(height, width)
+        return labyrinth
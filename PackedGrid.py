@@ -0,0 +1,100 @@
+import operator
+
+import numpy as np
+
+
+class PackedGrid:
+    """A read-only passability grid stored as one bit per cell, row after row, least significant bit first.
+
+    The bits are usually a view of a memory-mapped maze file, so the grid takes no memory of its own.
+    Single cells, indexed by Python or NumPy integers, are read straight from the bits; anything else, such as
+    slices or index arrays, unpacks the grid into a boolean array.
+    """
+
+    def __init__(self, bits: np.ndarray, height: int, width: int):
+        """Initializes a PackedGrid object over the given bits.
+
+        Args:
+        - bits (np.ndarray): The packed cells as a one-dimensional uint8 array.
+        - height (int): The number of rows of the grid.
+        - width (int): The number of columns of the grid.
+        """
+        self.bits = bits
+        self.height = height
+        self.width = width
+        self.shape = (height, width)
+        self.dtype = np.dtype(bool)
+        self.ndim = 2
+        self._bytes = memoryview(bits)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2:
+            try:
+                # Also accepts NumPy integers, such as the coordinates np.nonzero returns.
+                y, x = operator.index(key[0]), operator.index(key[1])
+            except TypeError:
+                return self.unpack()[key]
+            if y < 0:
+                y += self.height
+            if x < 0:
+                x += self.width
+            if not (0 <= y < self.height and 0 <= x < self.width):
+                raise IndexError(f"Cell {key} is outside the grid of shape {self.shape}")
+            index = y * self.width + x
+            return bool(self._bytes[index >> 3] >> (index & 7) & 1)
+        return self.unpack()[key]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        grid = self.unpack()
+        return grid if dtype is None else grid.astype(dtype)
+
+    def row(self, y: int) -> np.ndarray:
+        """Returns one row of the grid as a boolean array, unpacking only that row.
+
+        Args:
+        - y (int): The row to return.
+
+        Returns:
+        - np.ndarray: The passability of the cells of the row.
+        """
+        start = y * self.width
+        first, last = start >> 3, (start + self.width + 7) >> 3
+        cells = np.unpackbits(self.bits[first:last], bitorder="little")
+        return cells[start & 7:(start & 7) + self.width].view(bool)
+
+    def rows(self, first: int, last: int) -> np.ndarray:
+        """Returns a band of rows of the grid as a boolean array, unpacking only those rows.
+
+        Args:
+        - first (int): The first row of the band.
+        - last (int): The row after the last row of the band.
+
+        Returns:
+        - np.ndarray: An array of shape (last - first, width).
+        """
+        start, end = first * self.width, last * self.width
+        cells = np.unpackbits(self.bits[start >> 3:(end + 7) >> 3], bitorder="little")
+        return cells[start & 7:(start & 7) + end - start].view(bool).reshape(last - first, self.width)
+
+    def unpack(self) -> np.ndarray:
+        """Returns the whole grid as a boolean array of shape (height, width).
+        """
+        return self.rows(0, self.height)
+
+    def ravel(self) -> np.ndarray:
+        return self.unpack().ravel()
+
+    def tobytes(self) -> bytes:
+        return self.unpack().tobytes()
+
+    @staticmethod
+    def pack(grid: np.ndarray) -> np.ndarray:
+        """Packs a boolean grid into bits in the layout PackedGrid reads.
+
+        Args:
+        - grid (np.ndarray): The grid to pack.
+
+        Returns:
+        - np.ndarray: The packed cells as a one-dimensional uint8 array.
+        """
+        return np.packbits(np.asarray(grid, dtype=bool).ravel(), bitorder="little")
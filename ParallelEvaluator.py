@@ -0,0 +1,211 @@
+import os
+import random
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from BatchRollout import batch_solve
+from DistanceField import DistanceField
+from JunctionGraph import JunctionGraph
+from Solution import Solution, SolutionContext
+
+# State of a worker process, filled in once by _attach_worker.
+_worker: dict = {}
+
+
+class SharedLabyrinth:
+    """A read-only stand-in for a LabyrinthGenerator whose grid lives in shared memory.
+    """
+
+    def __init__(self, grid: np.ndarray, goal_position: Optional[Tuple[int, int]] = None,
+                 stored_distances: Optional[np.ndarray] = None):
+        self.grid = grid
+        self.height, self.width = grid.shape
+        self.version = 0
+        self.goal_position = goal_position
+        self.stored_distances = stored_distances
+
+    def get_labyrinth(self) -> np.ndarray:
+        return self.grid
+
+
+def share_array(array: np.ndarray) -> SharedMemory:
+    """Copies an array into a new shared memory block.
+
+    Args:
+    - array (np.ndarray): The array to share.
+
+    Returns:
+    - SharedMemory: The block holding a copy of the array.
+    """
+    block = SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block
+
+
+def open_shared_array(name: str, shape: Tuple[int, ...], dtype) -> Tuple[SharedMemory, np.ndarray]:
+    """Attaches to a shared memory block created by the parent process.
+
+    Args:
+    - name (str): The name of the block.
+    - shape (Tuple[int, ...]): The shape of the array stored in the block.
+    - dtype: The data type of the array stored in the block.
+
+    Returns:
+    - Tuple[SharedMemory, np.ndarray]: The block and an array viewing it.
+    """
+    if sys.version_info >= (3, 13):
+        block = SharedMemory(name=name, track=False)
+    else:
+        # Only the parent owns the block, so keep the worker from registering it with a resource tracker
+        # that would otherwise unlink it or complain about it when the worker exits.
+        register, resource_tracker.register = resource_tracker.register, lambda *args: None
+        try:
+            block = SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _attach_worker(grid_name: str, distances_name: str, shape: Tuple[int, int], init: Tuple[int, int],
+                   end: Tuple[int, int], best_path: List[Tuple[int, int]], rollout_backend: str) -> None:
+    """Initializes a worker process with views of the shared labyrinth and distance field.
+    """
+    grid_block, grid = open_shared_array(grid_name, shape, bool)
+    distances_block, distances = open_shared_array(distances_name, shape, np.intc)
+    labyrinth = SharedLabyrinth(grid)
+    junction_graph = JunctionGraph(labyrinth, pins=(init, end)) if rollout_backend == "corridor" else None
+    context = SolutionContext.create(init, end, labyrinth, best_path,
+                                     DistanceField.from_distances(labyrinth, end, distances),
+                                     junction_graph=junction_graph)
+    _worker.update(blocks=(grid_block, distances_block), labyrinth=labyrinth, context=context,
+                   rollout_backend=rollout_backend)
+
+
+def _solve_chunk(seed: np.random.SeedSequence, cells: np.ndarray, lengths: np.ndarray
+                 ) -> Tuple[np.ndarray, np.ndarray, List[bool], List[float]]:
+    """Solves and evaluates a chunk of solutions inside a worker process.
+
+    Args:
+    - seed (np.random.SeedSequence): The seed of the chunk; the same seed always yields the same walks.
+    - cells (np.ndarray): The flat cell indices of all paths of the chunk, one path after the other.
+    - lengths (np.ndarray): The length of every path of the chunk.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray, List[bool], List[float]]: The flat cell indices of the new steps, the
+      number of new steps per solution, whether each solution reached the end, and its fitness score.
+    """
+    labyrinth = _worker["labyrinth"]
+    rows, columns = np.divmod(cells, labyrinth.width)
+    cells_taken = list(zip(rows.tolist(), columns.tolist()))
+    # The solutions of a chunk are dropped once it is done, so every chunk reuses the nodes of the one before.
+    solutions, start, context = [], 0, _worker["context"]
+    for length in lengths.tolist():
+        solution = Solution(context)
+        solution.path = cells_taken[start:start + length]
+        solutions.append(solution)
+        start += length
+
+    if _worker["rollout_backend"] == "numpy":
+        batch_solve(solutions, np.random.default_rng(seed))
+    else:
+        random.seed(int(seed.generate_state(1, np.uint64)[0]))
+        for solution in solutions:
+            solution.solve()
+    for solution in solutions:
+        solution.score()
+
+    steps = [solution.path[length:] for solution, length in zip(solutions, lengths.tolist())]
+    new_cells = np.array([y * labyrinth.width + x for tail in steps for y, x in tail], dtype=np.int64)
+    return (new_cells, np.array([len(tail) for tail in steps], dtype=np.int64),
+            [solution.has_reached_end for solution in solutions],
+            [solution.fitness_score for solution in solutions])
+
+
+class ParallelEvaluator:
+    """Solves and evaluates a population on a pool of worker processes.
+
+    The labyrinth grid and the distance field are copied into shared memory once, when the evaluator is
+    created, so workers never receive them again. Later changes to the labyrinth are not seen by the workers.
+    The population is split into chunks of a fixed size, and every chunk draws its random numbers from a
+    seed derived from the evaluator seed, the generation and the chunk position, so results do not depend
+    on the number of workers or on which worker picks up which chunk.
+    """
+
+    def __init__(self, labyrinth, distance_field: DistanceField, init: Tuple[int, int], end: Tuple[int, int],
+                 best_path: List[Tuple[int, int]], workers: Optional[int] = None, chunk_size: int = 64,
+                 seed: Optional[int] = None, rollout_backend: str = "python"):
+        """Initializes a ParallelEvaluator object and starts its worker processes.
+
+        Args:
+        - labyrinth: The labyrinth object representing the maze.
+        - distance_field (DistanceField): The distances of every cell to the end position.
+        - init (Tuple[int, int]): The starting position of the solutions.
+        - end (Tuple[int, int]): The target position of the solutions.
+        - best_path (List[Tuple[int, int]]): The best path to the end position.
+        - workers (Optional[int]): The number of worker processes. Defaults to the number of CPUs.
+        - chunk_size (int): The number of solutions sent to a worker at a time.
+        - seed (Optional[int]): The seed all chunk seeds are derived from. Defaults to a random seed.
+        - rollout_backend (str): The rollout backend the workers use, "python", "numpy" or "corridor".
+        """
+        self.chunk_size = chunk_size
+        self.seed = random.getrandbits(64) if seed is None else seed
+        grid = np.ascontiguousarray(labyrinth.get_labyrinth(), dtype=bool)
+        self.width = grid.shape[1]
+        self._blocks = (share_array(grid), share_array(distance_field.get_distances()))
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(), initializer=_attach_worker,
+            initargs=(self._blocks[0].name, self._blocks[1].name, grid.shape, init, end, best_path,
+                      rollout_backend))
+        self._finalizer = weakref.finalize(self, ParallelEvaluator._release, self._executor, self._blocks)
+
+    @staticmethod
+    def _release(executor: ProcessPoolExecutor, blocks: Tuple[SharedMemory, ...]) -> None:
+        executor.shutdown()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    def close(self) -> None:
+        """Stops the worker processes and frees the shared memory.
+        """
+        self._finalizer()
+
+    def evaluate(self, solutions: List[Solution], generation: int) -> None:
+        """Solves every solution that can still move and evaluates the fitness score of all solutions.
+
+        Args:
+        - solutions (List[Solution]): The solutions to evaluate.
+        - generation (int): The current generation, used to derive the random seeds of the chunks.
+        """
+        walkers = []
+        for solution in solutions:
+            if solution.can_move:
+                walkers.append(solution)
+            else:
+                solution.score()
+        chunks = [walkers[i:i + self.chunk_size] for i in range(0, len(walkers), self.chunk_size)]
+        seeds = [np.random.SeedSequence(self.seed, spawn_key=(generation, i)) for i in range(len(chunks))]
+        paths = [[s.path for s in chunk] for chunk in chunks]
+        cells = [np.array([y * self.width + x for path in chunk for y, x in path], dtype=np.int64)
+                 for chunk in paths]
+        lengths = [np.array([len(path) for path in chunk], dtype=np.int64) for chunk in paths]
+
+        for chunk, (new_cells, step_counts, reached, fitness) in zip(
+                chunks, self._executor.map(_solve_chunk, seeds, cells, lengths)):
+            rows, columns = np.divmod(new_cells, self.width)
+            steps_taken = list(zip(rows.tolist(), columns.tolist()))
+            start = 0
+            for solution, steps, has_reached_end, fitness_score in zip(chunk, step_counts.tolist(), reached,
+                                                                       fitness):
+                solution.extend(steps_taken[start:start + steps])
+                solution.can_move = False
+                solution.has_reached_end = has_reached_end
+                solution.fitness_score = fitness_score
+                solution.dirty = False
+                start += steps
@@ -0,0 +1,182 @@
+import heapq
+from array import array
+from typing import List, Tuple
+
+import numpy as np
+
+
+class NoPathError(ValueError):
+    """Raised when the goal cannot be reached from the start.
+    """
+
+    def __init__(self, start: Tuple[int, int], goal: Tuple[int, int]):
+        super().__init__(f"No path from {start} to {goal}")
+        self.start = start
+        self.goal = goal
+
+
+class PathFinder:
+    """Finds shortest paths in one labyrinth grid with A* or bidirectional breadth-first search.
+
+    Cells are handled as flat indices into the grid padded with a wall on every side, so the four neighbors
+    of a cell are always at fixed offsets and never out of bounds. All per-cell state lives in arrays that
+    are allocated once per grid and reused by every search; each search stamps the cells it touches with its
+    own number instead of clearing the arrays, so memory stays the same however many searches run.
+    """
+
+    def __init__(self, grid: np.ndarray):
+        """Initializes a PathFinder object for the given grid.
+
+        Args:
+        - grid (np.ndarray): The passability grid. It is copied, so later changes to it are not seen.
+        """
+        grid = np.asarray(grid, dtype=bool)
+        self.height, self.width = grid.shape
+        self.stride = self.width + 2
+        self.passable = np.pad(grid, 1).tobytes()
+        size = len(self.passable)
+        self.g_scores = array("i", bytes(4 * size))
+        self.came_from = array("i", bytes(4 * size))
+        self.stamps = array("I", bytes(4 * size))
+        # Only needed by bidirectional searches, so only allocated by the first one.
+        self.back_g_scores = None
+        self.back_came_from = None
+        self.back_stamps = None
+        self.search = 0
+
+    def _index(self, cell: Tuple[int, int]) -> int:
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def _cell(self, index: int) -> Tuple[int, int]:
+        y, x = divmod(index, self.stride)
+        return y - 1, x - 1
+
+    def _next_search(self) -> int:
+        self.search += 1
+        if self.search == 1 << 32:
+            # The stamps wrapped around; clear them so no cell looks touched by the new search.
+            self.stamps = array("I", bytes(len(self.stamps)))
+            if self.back_stamps is not None:
+                self.back_stamps = array("I", bytes(len(self.back_stamps)))
+            self.search = 1
+        return self.search
+
+    def _trace(self, came_from: array, index: int) -> List[Tuple[int, int]]:
+        path = []
+        while index >= 0:
+            path.append(self._cell(index))
+            index = came_from[index]
+        return path
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int],
+                  bidirectional: bool = False) -> List[Tuple[int, int]]:
+        """Finds a shortest path between two cells.
+
+        Args:
+        - start (Tuple[int, int]): The cell to start from.
+        - goal (Tuple[int, int]): The cell to reach.
+        - bidirectional (bool): Search from both ends at once with breadth-first search instead of A*.
+
+        Returns:
+        - List[Tuple[int, int]]: The cells of the path, from start to goal.
+
+        Raises:
+        - NoPathError: If the goal cannot be reached from the start.
+        """
+        for y, x in (start, goal):
+            if not (0 <= y < self.height and 0 <= x < self.width):
+                raise NoPathError(start, goal)
+        source, target = self._index(start), self._index(goal)
+        if not (self.passable[source] and self.passable[target]):
+            raise NoPathError(start, goal)
+        path = self._bidirectional(source, target) if bidirectional else self._a_star(source, target)
+        if path is None:
+            raise NoPathError(start, goal)
+        return path
+
+    def _a_star(self, source: int, target: int):
+        """A* with the Manhattan distance. Ties in f are broken towards the smaller heuristic, which is the
+        cell closer to the goal, so along a corridor of equal f the search runs straight to its end.
+        """
+        stride, passable = self.stride, self.passable
+        g_scores, came_from, stamps = self.g_scores, self.came_from, self.stamps
+        search = self._next_search()
+        target_y, target_x = divmod(target, stride)
+        size = len(passable)
+        # Every open entry is one int ordered like (f, h, index), cheaper to push and compare than a tuple.
+        h_scale = (self.height + self.width + 4) * size
+        stamps[source], g_scores[source], came_from[source] = search, 0, -1
+        open_list = [source]
+        # An expanded cell has its g score stored as -1 - g, so stale open entries for it are skipped.
+        while open_list:
+            index = heapq.heappop(open_list) % size
+            g_score = g_scores[index]
+            if g_score < 0:
+                continue
+            if index == target:
+                path = self._trace(came_from, index)
+                path.reverse()
+                return path
+            g_scores[index] = -g_score - 1
+            tentative_g_score = g_score + 1
+            y, x = divmod(index, stride)
+            # Moving one step changes the Manhattan distance by exactly one, towards or away from the goal.
+            h_score = abs(y - target_y) + abs(x - target_x)
+            for neighbor, h in ((index + 1, h_score - 1 if x < target_x else h_score + 1),
+                                (index - 1, h_score - 1 if x > target_x else h_score + 1),
+                                (index + stride, h_score - 1 if y < target_y else h_score + 1),
+                                (index - stride, h_score - 1 if y > target_y else h_score + 1)):
+                if not passable[neighbor]:
+                    continue
+                if stamps[neighbor] == search:
+                    neighbor_g_score = g_scores[neighbor]
+                    if neighbor_g_score < 0 or neighbor_g_score <= tentative_g_score:
+                        continue
+                stamps[neighbor], g_scores[neighbor], came_from[neighbor] = search, tentative_g_score, index
+                heapq.heappush(open_list, (tentative_g_score + h) * h_scale + h * size + neighbor)
+        return None
+
+    def _bidirectional(self, source: int, target: int):
+        """Breadth-first search from both ends, always growing the smaller frontier by one whole level. Once
+        the frontiers touch, the level is finished and the shortest of the meetings found in it is used.
+        """
+        if self.back_stamps is None:
+            size = len(self.passable)
+            self.back_g_scores = array("i", bytes(4 * size))
+            self.back_came_from = array("i", bytes(4 * size))
+            self.back_stamps = array("I", bytes(4 * size))
+        passable, stride = self.passable, self.stride
+        search = self._next_search()
+        sides = ((self.g_scores, self.came_from, self.stamps),
+                 (self.back_g_scores, self.back_came_from, self.back_stamps))
+        for (g_scores, came_from, stamps), index in zip(sides, (source, target)):
+            stamps[index], g_scores[index], came_from[index] = search, 0, -1
+        if source == target:
+            return [self._cell(source)]
+        frontiers = [[source], [target]]
+        offsets = (1, stride, -1, -stride)
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            g_scores, came_from, stamps = sides[side]
+            other_g_scores, _, other_stamps = sides[1 - side]
+            best_length, meeting = None, None
+            next_frontier = []
+            for index in frontiers[side]:
+                distance = g_scores[index] + 1
+                for offset in offsets:
+                    neighbor = index + offset
+                    if not passable[neighbor] or stamps[neighbor] == search:
+                        continue
+                    stamps[neighbor], g_scores[neighbor], came_from[neighbor] = search, distance, index
+                    next_frontier.append(neighbor)
+                    if other_stamps[neighbor] == search:
+                        length = distance + other_g_scores[neighbor]
+                        if best_length is None or length < best_length:
+                            best_length, meeting = length, neighbor
+            if meeting is not None:
+                path = self._trace(self.came_from, meeting)
+                path.reverse()
+                path.extend(self._trace(self.back_came_from, self.back_came_from[meeting]))
+                return path
+            frontiers[side] = next_frontier
+        return None
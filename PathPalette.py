@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class PathPalette:
+    """Picks a random color for every path position, the first time that many paths are drawn.
+
+    The path at the same position keeps its color from one drawing to the next. The colors come from a random
+    number generator of the palette, so drawing never changes the random numbers a solver draws.
+    """
+
+    def __init__(self, seed=None):
+        """Initializes a PathPalette object with no colors picked yet.
+
+        Args:
+        - seed: The seed of the colors. Defaults to different colors every time.
+        """
+        self.colors = np.empty((0, 3), dtype=np.uint8)
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, count: int) -> np.ndarray:
+        """Returns the colors of the first paths, picking colors for paths never drawn before.
+
+        Args:
+        - count (int): The number of paths.
+
+        Returns:
+        - np.ndarray: An array of shape (count, 3) holding the RGB color of every path.
+        """
+        if len(self.colors) < count:
+            new_colors = self.rng.integers(0, 255, (count - len(self.colors), 3), dtype=np.uint8)
+            self.colors = np.concatenate((self.colors, new_colors))
+        return self.colors[:count]
@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List, Tuple
+
+ROOT = -1
+
+
+class PathStore:
+    """A tree of cells that stores many paths with their common prefixes shared.
+
+    A path is a handle to a node; the path is the chain of cells from the root of the tree down to that
+    node. Adding the same cell after the same node twice returns the same node, so the tree only grows
+    with the number of distinct prefixes explored. Nodes are reference counted by the handles held on them
+    and by their children, and are recycled once nothing refers to them.
+
+    Every node also keeps a jump pointer, which lets `ancestor` cut a path down to any prefix in
+    logarithmic time.
+    """
+
+    def __init__(self):
+        """Initializes an empty PathStore object.
+        """
+        self.cells: List[Tuple[int, int]] = []
+        self.parents: List[int] = []
+        self.jumps: List[int] = []
+        self.depths: List[int] = []
+        self.references: List[int] = []
+        self.children: Dict[Tuple[int, Tuple[int, int]], int] = {}
+        self.free: List[int] = []
+
+    def __len__(self) -> int:
+        """Returns the number of nodes in use.
+        """
+        return len(self.cells) - len(self.free)
+
+    def add(self, node: int, cell: Tuple[int, int]) -> int:
+        """Returns a new handle on the path made of a path followed by one more cell.
+
+        Args:
+        - node (int): The path to extend, or ROOT to start a new path.
+        - cell (Tuple[int, int]): The cell to append.
+
+        Returns:
+        - int: The node of the longer path. The handle on the shorter path is not released.
+        """
+        child = self.children.get((node, cell))
+        if child is not None:
+            self.references[child] += 1
+            return child
+        if node == ROOT:
+            depth, jump = 0, None
+        else:
+            depth = self.depths[node] + 1
+            self.references[node] += 1
+            node_jump = self.jumps[node]
+            if self.depths[node] - self.depths[node_jump] == self.depths[node_jump] - self.depths[self.jumps[node_jump]]:
+                jump = self.jumps[node_jump]
+            else:
+                jump = node
+        if self.free:
+            child = self.free.pop()
+            self.cells[child], self.parents[child], self.depths[child], self.references[child] = cell, node, depth, 1
+        else:
+            child = len(self.cells)
+            self.cells.append(cell)
+            self.parents.append(node)
+            self.depths.append(depth)
+            self.references.append(1)
+            self.jumps.append(None)
+        self.jumps[child] = child if jump is None else jump
+        self.children[(node, cell)] = child
+        return child
+
+    def extend(self, node: int, cells: Iterable[Tuple[int, int]]) -> int:
+        """Returns a new handle on the path made of a path followed by several cells.
+
+        Args:
+        - node (int): The path to extend, or ROOT to start a new path.
+        - cells (Iterable[Tuple[int, int]]): The cells to append, in order.
+
+        Returns:
+        - int: The node of the longer path. The handle on the shorter path is not released.
+        """
+        self.retain(node)
+        for cell in cells:
+            child = self.add(node, cell)
+            self.release(node)
+            node = child
+        return node
+
+    def retain(self, node: int) -> None:
+        """Takes another handle on a path.
+
+        Args:
+        - node (int): The path, or ROOT, which needs no handle.
+        """
+        if node != ROOT:
+            self.references[node] += 1
+
+    def release(self, node: int) -> None:
+        """Gives up a handle on a path, recycling the nodes nothing refers to anymore.
+
+        Args:
+        - node (int): The path, or ROOT, which needs no handle.
+        """
+        while node != ROOT:
+            self.references[node] -= 1
+            if self.references[node]:
+                return
+            parent = self.parents[node]
+            del self.children[(parent, self.cells[node])]
+            self.cells[node] = None
+            self.free.append(node)
+            node = parent
+
+    def depth(self, node: int) -> int:
+        """Returns the number of cells of a path minus one.
+        """
+        return self.depths[node]
+
+    def cell(self, node: int) -> Tuple[int, int]:
+        """Returns the last cell of a path.
+        """
+        return self.cells[node]
+
+    def ancestor(self, node: int, depth: int) -> int:
+        """Returns the prefix of a path that ends at the given depth, without taking a handle on it.
+
+        Args:
+        - node (int): The path.
+        - depth (int): The depth of the prefix, between 0 and the depth of the path.
+
+        Returns:
+        - int: The node of the prefix.
+        """
+        depths, jumps, parents = self.depths, self.jumps, self.parents
+        while depths[node] > depth:
+            node = jumps[node] if depths[jumps[node]] >= depth else parents[node]
+        return node
+
+    def path(self, node: int) -> List[Tuple[int, int]]:
+        """Returns the cells of a path, from the root to the node.
+
+        Args:
+        - node (int): The path.
+
+        Returns:
+        - List[Tuple[int, int]]: A new list of the cells of the path.
+        """
+        cells, parents = self.cells, self.parents
+        path = []
+        while node != ROOT:
+            path.append(cells[node])
+            node = parents[node]
+        path.reverse()
+        return path
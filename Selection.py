@@ -0,0 +1,174 @@
+from typing import Tuple
+
+import numpy as np
+
+# Parent selection for a whole generation at once. Every strategy turns the fitness scores into selection
+# weights, then all pairs are drawn together from the cumulative weights with binary searches. The second
+# parent of a pair is drawn with the first one left out: its weight is cut out of the cumulative weights, so
+# the two parents are always distinct without redrawing, and the second parent is distributed exactly as if
+# it had been redrawn until it differed from the first.
+
+STRATEGIES = ("tournament", "rank", "sus")
+
+
+def _tie_averaged(sorted_fitness: np.ndarray, sorted_weights: np.ndarray) -> np.ndarray:
+    """Gives every group of equal fitness scores the mean weight of the group.
+
+    Args:
+    - sorted_fitness (np.ndarray): The fitness scores in ascending order.
+    - sorted_weights (np.ndarray): The weights of the scores in the same order.
+
+    Returns:
+    - np.ndarray: The weights with ties averaged, in the same order.
+    """
+    groups = np.concatenate(([0], np.cumsum(sorted_fitness[1:] != sorted_fitness[:-1])))
+    return (np.bincount(groups, sorted_weights) / np.bincount(groups))[groups]
+
+
+def _unsort(order: np.ndarray, sorted_weights: np.ndarray) -> np.ndarray:
+    weights = np.empty_like(sorted_weights)
+    weights[order] = sorted_weights
+    return weights
+
+
+def tournament_weights(fitness: np.ndarray, tournament_size: int) -> np.ndarray:
+    """Returns the probability of every solution to win a tournament between distinct random solutions.
+
+    The winner of a tournament of size k is the fittest of k solutions, so the solution at position r of the
+    ascending order wins with a probability proportional to the number of ways to pick the k - 1 others from
+    the r solutions below it, C(r, k - 1). This replaces playing every tournament.
+
+    Args:
+    - fitness (np.ndarray): The fitness score of every solution.
+    - tournament_size (int): The number of solutions in a tournament, between 1 and the population size.
+
+    Returns:
+    - np.ndarray: The weights, in the order of the solutions.
+    """
+    order = np.argsort(fitness, kind="stable")
+    size = len(fitness)
+    log_weights = np.full(size, -np.inf)
+    positions = np.arange(tournament_size, size)
+    log_weights[tournament_size - 1] = 0
+    log_weights[tournament_size:] = np.cumsum(np.log(positions) - np.log(positions - tournament_size + 1))
+    sorted_weights = np.exp(log_weights - log_weights[-1])
+    return _unsort(order, _tie_averaged(fitness[order], sorted_weights))
+
+
+def rank_weights(fitness: np.ndarray) -> np.ndarray:
+    """Returns weights proportional to the rank of every solution, the least fit having rank 1.
+
+    Args:
+    - fitness (np.ndarray): The fitness score of every solution.
+
+    Returns:
+    - np.ndarray: The weights, in the order of the solutions.
+    """
+    order = np.argsort(fitness, kind="stable")
+    return _unsort(order, _tie_averaged(fitness[order], np.arange(1, len(fitness) + 1, dtype=float)))
+
+
+def fitness_weights(fitness: np.ndarray) -> np.ndarray:
+    """Returns the fitness scores as weights, or equal weights if no solution has any fitness.
+
+    Args:
+    - fitness (np.ndarray): The fitness score of every solution.
+
+    Returns:
+    - np.ndarray: The weights, in the order of the solutions.
+    """
+    weights = np.maximum(np.asarray(fitness, dtype=float), 0)
+    return weights if weights.sum() > 0 else np.ones(len(weights))
+
+
+def draw_partners(cumulative: np.ndarray, first: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Draws a partner for every given solution, never the solution itself.
+
+    Args:
+    - cumulative (np.ndarray): The cumulative weights of the solutions.
+    - first (np.ndarray): The indices of the solutions that need a partner.
+    - rng (np.random.Generator): The random generator.
+
+    Returns:
+    - np.ndarray: The indices of the partners.
+    """
+    starts = np.concatenate(([0.0], cumulative[:-1]))[first]
+    own_weights = cumulative[first] - starts
+    remaining = cumulative[-1] - own_weights
+    # A solution holding all of the weight leaves nothing to draw from, so its partner is drawn uniformly.
+    degenerate = remaining <= 0
+    targets = rng.random(len(first)) * np.where(degenerate, 1, remaining)
+    targets += np.where(targets >= starts, own_weights, 0)
+    second = np.minimum(np.searchsorted(cumulative, targets, side="right"), len(cumulative) - 1)
+    if degenerate.any():
+        others = rng.integers(0, len(cumulative) - 1, int(degenerate.sum()))
+        second[degenerate] = others + (others >= first[degenerate])
+    return second
+
+
+def draw_pairs(weights: np.ndarray, count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Draws pairs of distinct solutions, each solution with a probability proportional to its weight.
+
+    Args:
+    - weights (np.ndarray): The weight of every solution. At least one must be positive.
+    - count (int): The number of pairs.
+    - rng (np.random.Generator): The random generator.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The indices of the first and of the second parents.
+    """
+    cumulative = np.cumsum(weights)
+    first = np.minimum(np.searchsorted(cumulative, rng.random(count) * cumulative[-1], side="right"),
+                       len(weights) - 1)
+    return first, draw_partners(cumulative, first, rng)
+
+
+def sus_pairs(fitness: np.ndarray, count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Draws pairs of distinct solutions with stochastic universal sampling over the fitness scores.
+
+    All parents are picked by equally spaced pointers from one random offset, so every solution is picked
+    within one of its expected number of times. The picks are shuffled and split into pairs; a pair that
+    ends up with the same solution twice gets its second parent drawn with `draw_partners` instead.
+
+    Args:
+    - fitness (np.ndarray): The fitness score of every solution.
+    - count (int): The number of pairs.
+    - rng (np.random.Generator): The random generator.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The indices of the first and of the second parents.
+    """
+    cumulative = np.cumsum(fitness_weights(fitness))
+    spacing = cumulative[-1] / (2 * count)
+    pointers = (rng.random() + np.arange(2 * count)) * spacing
+    picks = np.minimum(np.searchsorted(cumulative, pointers, side="right"), len(fitness) - 1)
+    picks = rng.permutation(picks)
+    first, second = picks[:count], picks[count:]
+    same = first == second
+    if same.any():
+        second[same] = draw_partners(cumulative, first[same], rng)
+    return first, second
+
+
+def select_pairs(strategy: str, fitness: np.ndarray, count: int, rng: np.random.Generator,
+                 tournament_size: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """Draws the parents of a whole generation.
+
+    Args:
+    - strategy (str): One of STRATEGIES.
+    - fitness (np.ndarray): The fitness score of every solution. There must be at least two solutions.
+    - count (int): The number of pairs.
+    - rng (np.random.Generator): The random generator.
+    - tournament_size (int): The number of solutions in a tournament, for the "tournament" strategy.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The indices of the first and of the second parents.
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    if strategy == "tournament":
+        return draw_pairs(tournament_weights(fitness, min(max(1, tournament_size), len(fitness))), count, rng)
+    if strategy == "rank":
+        return draw_pairs(rank_weights(fitness), count, rng)
+    if strategy == "sus":
+        return sus_pairs(fitness, count, rng)
+    raise ValueError(f"Unknown selection strategy {strategy!r}, expected one of {STRATEGIES}")
@@ -1,33 +1,173 @@
 import random
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
-from helperFunctions import *
+import numpy as np
+
+from helperFunctions import map_scale
+from DistanceField import DistanceField
+from PathStore import PathStore, ROOT
+from JunctionGraph import JunctionGraph
+
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+
+class VisitMarks:
+    """Marks the cells of one path of a PathStore, the path of the solution that is walking.
+
+    When another path is to be marked, only the cells below the longest common prefix of the two paths are
+    unmarked and marked, so a child or mutant starting a walk costs as much as the part of its path that
+    differs from the path walked before it, not its whole path. The marked path holds a handle on its node.
+    """
+
+    def __init__(self, path_store: PathStore, width: int, cells: int):
+        """Initializes a VisitMarks object with no cell marked.
+
+        Args:
+        - path_store (PathStore): The store holding the paths to mark.
+        - width (int): The width of the labyrinth.
+        - cells (int): The number of cells of the labyrinth.
+        """
+        self.path_store = path_store
+        self.width = width
+        self.marks = bytearray(cells)
+        self.node = ROOT
+
+    def mark(self, node: int) -> bytearray:
+        """Marks the cells of the path of a node instead of the path marked so far.
+
+        Args:
+        - node (int): The path to mark.
+
+        Returns:
+        - bytearray: The marks of all cells by flat index, 1 on the path and 0 elsewhere.
+        """
+        if node == self.node:
+            return self.marks
+        store, marks, width = self.path_store, self.marks, self.width
+        cells, parents, depths = store.cells, store.parents, store.depths
+        old, new = self.node, node
+        old_depth = -1 if old == ROOT else depths[old]
+        new_depth = -1 if new == ROOT else depths[new]
+        # Climb both paths to their common prefix. A path never visits a cell twice, so the cells passed on
+        # the way are exactly the ones to unmark and mark; the old ones are unmarked before any is marked.
+        added = []
+        while old != new:
+            if old_depth >= new_depth:
+                y, x = cells[old]
+                marks[y * width + x] = 0
+                old, old_depth = parents[old], old_depth - 1
+            else:
+                added.append(cells[new])
+                new, new_depth = parents[new], new_depth - 1
+        for y, x in added:
+            marks[y * width + x] = 1
+        self._hold(node)
+        return marks
+
+    def advance(self, node: int, cells: Iterable[Tuple[int, int]]) -> None:
+        """Marks the cells a walk appended to the marked path. The caller must hold handles on both paths.
+
+        Args:
+        - node (int): The path made of the marked path followed by the cells.
+        - cells (Iterable[Tuple[int, int]]): The appended cells.
+        """
+        marks, width = self.marks, self.width
+        for y, x in cells:
+            marks[y * width + x] = 1
+        # The handle moves on with the walk. The caller holds the old path, so it cannot be freed here and
+        # the reference counts are changed directly, as this runs for every step of every walk.
+        references = self.path_store.references
+        references[node] += 1
+        references[self.node] -= 1
+        self.node = node
+
+    def _hold(self, node: int) -> None:
+        self.path_store.retain(node)
+        if self.node != ROOT:
+            self.path_store.release(self.node)
+        self.node = node
+
+
+class SolutionContext(NamedTuple):
+    """Everything about the labyrinth that all solutions of a population share and never change.
+
+    Each solution only holds a reference to the context, so a population costs one context per labyrinth
+    instead of a copy of these fields per solution. The only state in it is the VisitMarks of the walking
+    solution, so the solutions of a context must not walk from several threads at once.
+    """
+    init: Tuple[int, int]
+    end: Tuple[int, int]
+    labyrinth: object
+    grid: np.ndarray
+    height: int
+    width: int
+    best_path: List[Tuple[int, int]]
+    best_distance: int
+    distance_field: DistanceField
+    path_store: PathStore
+    junction_graph: Optional[JunctionGraph]
+    visits: VisitMarks
+    directions: Tuple[Tuple[int, int], ...] = DIRECTIONS
+
+    @classmethod
+    def create(cls, init: Tuple[int, int], end: Tuple[int, int], labyrinth, best_path: List[Tuple[int, int]],
+               distance_field: DistanceField, path_store: Optional[PathStore] = None,
+               junction_graph: Optional[JunctionGraph] = None) -> "SolutionContext":
+        """Builds the context of a population.
+
+        Args:
+        - init (Tuple[int, int]): The starting position of the solutions.
+        - end (Tuple[int, int]): The target position of the solutions.
+        - labyrinth: The labyrinth object representing the maze. Its grid is read once, here.
+        - best_path (List[Tuple[int, int]]): The best path to the end position.
+        - distance_field (DistanceField): The distances of every cell to the end position.
+        - path_store (Optional[PathStore]): The store holding the paths of the population. Defaults to a new store.
+        - junction_graph (Optional[JunctionGraph]): If given, the solutions only make random choices at
+          junctions and follow every corridor to its end in one move.
+
+        Returns:
+        - SolutionContext: The context.
+        """
+        path_store = PathStore() if path_store is None else path_store
+        return cls(tuple(init), tuple(end), labyrinth, labyrinth.get_labyrinth(), labyrinth.height,
+                   labyrinth.width, best_path, len(best_path), distance_field, path_store, junction_graph,
+                   VisitMarks(path_store, labyrinth.width, labyrinth.height * labyrinth.width))
+
+
+class SolutionSnapshot(NamedTuple):
+    """An immutable copy of a solution, which stays the same while the solution object is reused.
+    """
+    path: Tuple[Tuple[int, int], ...]
+    fitness_score: float
+    has_reached_end: bool
+
+    def __str__(self) -> str:
+        return f"{list(self.path)} Fitness: {self.fitness_score}"
 
 
 class Solution:
     """A class representing a solution to the labyrinth problem.
+
+    The path of the solution lives in a PathStore that the whole population shares, so solutions with a
+    common prefix share its cells. The solution only holds a handle on its path, its state and a reference
+    to the SolutionContext of its population; it has no `__dict__`, and the solver reuses solution objects
+    from one generation to the next instead of allocating new ones.
     """
+    __slots__ = ("context", "node", "fitness_score", "can_move", "has_reached_end", "dirty")
 
-    def __init__(self, init: tuple, end: tuple,
-                 labyrinth, best_path: List[Tuple[int, int]]):
-        """Initializes a Solution object.
+    def __init__(self, context: SolutionContext):
+        """Initializes a Solution object whose path is just the starting position.
 
         Args:
-        - init (tuple): The starting position for the solution.
-        - end (tuple): The target position for the solution.
-        - labyrinth: The labyrinth object representing the maze.
-        - best_path (List[Tuple[int, int]]): The best path to the end position.
+        - context (SolutionContext): The shared context of the population.
         """
+        self.context = context
+        self.node = context.path_store.add(ROOT, context.init)
         self.fitness_score = 0
-        self.possible_directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
         self.can_move = True
         self.has_reached_end = False
-        self.path = [init]
-        self.labyrinth = labyrinth
-        self.end = end
-        self.color = (random.randrange(0, 255), random.randrange(
-            0, 255), random.randrange(0, 255), random.uniform(0, 1))
-        self.best_path = best_path
-        self.best_distance = len(best_path)
+        # Whether the path changed since the fitness score was last computed.
+        self.dirty = True
 
     def __str__(self) -> str:
         """Returns a string representation of the Solution object.
@@ -37,6 +177,60 @@ class Solution:
         """
         return f"{self.path} Fitness: {self.fitness_score}"
 
+    def snapshot(self) -> SolutionSnapshot:
+        """Returns an immutable copy of the path, fitness score and outcome of the solution.
+        """
+        return SolutionSnapshot(tuple(self.path), self.fitness_score, self.has_reached_end)
+
+    def __del__(self):
+        self.context.path_store.release(self.node)
+
+    @property
+    def path(self) -> List[Tuple[int, int]]:
+        """Returns the cells of the path of the solution, as a new list.
+        """
+        return self.context.path_store.path(self.node)
+
+    @path.setter
+    def path(self, cells: List[Tuple[int, int]]) -> None:
+        store = self.context.path_store
+        node = store.extend(ROOT, cells)
+        store.release(self.node)
+        self.node = node
+        self.dirty = True
+
+    def path_length(self) -> int:
+        """Returns the number of cells of the path.
+        """
+        return self.context.path_store.depth(self.node) + 1
+
+    def last_position(self) -> Tuple[int, int]:
+        """Returns the cell the path ends in.
+        """
+        return self.context.path_store.cell(self.node)
+
+    def extend(self, cells: List[Tuple[int, int]]) -> None:
+        """Appends cells to the path.
+
+        Args:
+        - cells (List[Tuple[int, int]]): The cells to append, in order.
+        """
+        store, visits = self.context.path_store, self.context.visits
+        node = store.extend(self.node, cells)
+        if visits.node == self.node:
+            visits.advance(node, cells)
+        store.release(self.node)
+        self.node = node
+        self.dirty = True
+
+    def reset(self) -> None:
+        """Turns the solution back into a new one whose path is just the starting position, so it can be reused.
+        """
+        self._point_to(self.node, 1)
+        self.fitness_score = 0
+        self.can_move = True
+        self.has_reached_end = False
+
     @staticmethod
     def _is_valid_position(y: int, x: int, maze_height: int, maze_width: int) -> bool:
         """Returns whether a given position is valid.
@@ -61,7 +255,8 @@ class Solution:
         Returns:
         - tuple: A tuple representing the new position.
         """
-        return self.path[-1][0] + d[0], self.path[-1][1] + d[1]
+        last_position = self.context.path_store.cell(self.node)
+        return last_position[0] + d[0], last_position[1] + d[1]
 
     def _is_valid_direction(self, d: tuple) -> bool:
         """Returns whether a given direction is valid.
@@ -72,27 +267,70 @@ class Solution:
         Returns:
         - bool: True if the direction is valid, False otherwise.
         """
+        context = self.context
+        marks = context.visits.mark(self.node)
         new_position = self._get_new_position(d)
-        maze = self.labyrinth.get_labyrinth()
-        return (self._is_valid_position(new_position[0], new_position[1], self.labyrinth.height, self.labyrinth.width)
-                and maze[new_position[0]][new_position[1]] == (255, 255, 255)
-                and new_position not in self.path)
+        return (self._is_valid_position(new_position[0], new_position[1], context.height, context.width)
+                and context.grid[new_position]
+                and not marks[new_position[0] * context.width + new_position[1]])
 
     def move(self) -> None:
         """Moves the solution in a random valid direction.
         """
         if self.can_move:
-            valid_directions = [
-                d for d in self.possible_directions if self._is_valid_direction(d)]
-            if valid_directions:
-                self.path.append(self._get_new_position(
-                    random.choice(valid_directions)))
-                if self.path[-1] == self.end:
-                    self.can_move = False
-                    self.has_reached_end = True
+            context = self.context
+            visits = context.visits
+            marks = visits.marks if visits.node == self.node else visits.mark(self.node)
+            # The same checks as `_is_valid_direction`, with the last position looked up once per move.
+            y, x = context.path_store.cell(self.node)
+            grid, width = context.grid, context.width
+            valid_positions = [
+                (y + dy, x + dx) for dy, dx in context.directions
+                if 0 <= y + dy < context.height and 0 <= x + dx < width
+                and grid[y + dy, x + dx] and not marks[(y + dy) * width + x + dx]]
+            if valid_positions:
+                new_position = random.choice(valid_positions)
+                if context.junction_graph is not None:
+                    self._follow_corridor(new_position)
+                else:
+                    store = context.path_store
+                    node = store.add(self.node, new_position)
+                    # `visits.advance` for a single cell, inlined as this runs for every step of every walk.
+                    marks[new_position[0] * width + new_position[1]] = 1
+                    store.references[node] += 1
+                    store.references[self.node] -= 1
+                    visits.node = node
+                    store.release(self.node)
+                    self.node = node
+                    self.dirty = True
+                    if new_position == context.end:
+                        self.can_move = False
+                        self.has_reached_end = True
             else:
                 self.can_move = False
 
+    def _follow_corridor(self, step: Tuple[int, int]) -> None:
+        """Moves along the corridor starting with the given step, up to the next junction or dead end.
+
+        Inside a corridor the only valid direction is onward, so this ends up where moving one cell at a time
+        would. The corridor is cut short at a cell that was already visited or at the end position.
+
+        Args:
+        - step (Tuple[int, int]): The valid first step into the corridor.
+        """
+        corridor = self.context.junction_graph.corridor(self.last_position(), step)
+        marks, width = self.context.visits.mark(self.node), self.context.width
+        for index, cell in enumerate(corridor):
+            if cell == self.context.end:
+                corridor = corridor[:index + 1]
+                self.can_move = False
+                self.has_reached_end = True
+                break
+            if marks[cell[0] * width + cell[1]]:
+                corridor = corridor[:index]
+                break
+        self.extend(corridor)
+
     def solve(self) -> None:
         """Attempts to solve the maze by repeatedly moving the solution until it reaches the end position.
         """
@@ -100,30 +338,56 @@ class Solution:
             self.move()
 
     def evaluate(self) -> None:
-        """Evaluates the fitness score of the solution based on its distance to the end position.
+        """Moves the solution until it cannot move anymore and evaluates its fitness score.
         """
         self.solve()
-        last_position = self.path[-1]
-        distance = (len(find_path(last_position, self.end, self.labyrinth.get_labyrinth()))
+        self.score()
+
+    def score(self) -> None:
+        """Evaluates the fitness score of the solution based on its distance to the end position.
+        """
+        context = self.context
+        last_position = self.last_position()
+        distance = (context.distance_field.path_length(last_position)
                     if not self.has_reached_end else 0)
         self.fitness_score = min(1, max(
-            0, (self.best_distance ** 2 - distance ** 2) / (self.best_distance ** 2)))
+            0, (context.best_distance ** 2 - distance ** 2) / (context.best_distance ** 2)))
+        self.dirty = False
 
-    def crossover(self, partner: "Solution") -> "Solution":
+    def crossover(self, partner: "Solution", child: Optional["Solution"] = None) -> "Solution":
         """Performs crossover with another Solution object to create a child solution.
 
         Args:
         - partner (Solution): The other Solution object to perform crossover with.
+        - child (Optional[Solution]): A solution that is no longer needed, to be reused as the child instead
+          of allocating a new one. It must not be one of the parents.
 
         Returns:
         - Solution: A child Solution object created through crossover.
         """
-        child = Solution(self.path[0], self.end,
-                         self.labyrinth, self.best_path)
         max_parent = max(self, partner, key=lambda x: x.fitness_score)
-        index = int(len(max_parent.path) * 0.8)
-        child.path = max_parent.path[:index]
+        if child is None:
+            child = Solution(self.context)
+        else:
+            child.fitness_score = 0
+            child.can_move = True
+            child.has_reached_end = False
+        child._point_to(max_parent.node, max(1, int(max_parent.path_length() * 0.8)))
         return child
 
     def mutate(self):
-        self.path = self.path[:int(map_scale(random.random(), 0, 1, 1, len(self.path)))]
+        self._point_to(self.node, int(map_scale(random.random(), 0, 1, 1, self.path_length())))
+
+    def _point_to(self, node: int, length: int) -> None:
+        """Makes the path a prefix of a path in the store, without copying any cells.
+
+        Args:
+        - node (int): The path to take the prefix of.
+        - length (int): The number of cells to keep.
+        """
+        store = self.context.path_store
+        prefix = store.ancestor(node, length - 1)
+        store.retain(prefix)
+        store.release(self.node)
+        self.node = prefix
+        self.dirty = True
@@ -0,0 +1,85 @@
+import queue
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+from GALabyrinthSolver import GALabyrinthSolver
+from GenerationStats import GenerationStats
+
+
+class GenerationSnapshot(NamedTuple):
+    """An immutable copy of what a generation looks like, safe to read from another thread.
+    """
+    generation: int
+    highest_fitness: float
+    found_solution: bool
+    paths: Tuple[Tuple[Tuple[int, int], ...], ...]
+
+
+class SolverWorker:
+    """Runs a GALabyrinthSolver on a background thread and publishes a snapshot after every generation.
+
+    Readers only ever see the most recent snapshot; snapshots they did not get to in time are dropped, so a
+    slow reader never holds the solver back and a slow solver never freezes the reader. The time the reader
+    spends drawing is handed back with `add_rendering_time` and counted on the solver thread, whose timer is not
+    safe to touch from anywhere else.
+    """
+
+    def __init__(self, solver: GALabyrinthSolver):
+        """Initializes a SolverWorker object for the given solver.
+
+        Args:
+        - solver (GALabyrinthSolver): The solver to run. It must not be used by anything else while it runs.
+        """
+        self.solver = solver
+        self.history: List[Tuple[int, float]] = []
+        self._latest: Optional[GenerationSnapshot] = None
+        self._stop = threading.Event()
+        self._rendering_times: "queue.SimpleQueue[float]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="SolverWorker", daemon=True)
+
+    def _publish(self, stats: GenerationStats) -> None:
+        """Takes a snapshot of the current generation and makes it the latest one.
+        """
+        population = self.solver.population
+        self.history.append((stats.generation, stats.max_fitness))
+        self._latest = GenerationSnapshot(stats.generation, stats.max_fitness, stats.found_solution,
+                                          tuple(tuple(p.path) for p in population))
+
+    def _run(self) -> None:
+        for stats in self.solver.run():
+            self._publish(stats)
+            # Counted towards the next generation, like any time spent between two generations.
+            while not self._rendering_times.empty():
+                self.solver.timer.add("rendering", self._rendering_times.get())
+            if self._stop.is_set():
+                break
+
+    def start(self) -> None:
+        """Starts running the solver in the background.
+        """
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Asks the solver to stop after the current generation and waits until it has.
+        """
+        self._stop.set()
+        self._thread.join()
+
+    def is_running(self) -> bool:
+        """Returns whether the solver is still working on generations.
+        """
+        return self._thread.is_alive()
+
+    def add_rendering_time(self, seconds: float) -> None:
+        """Reports time spent drawing snapshots, to be added to the solver's rendering phase. Safe to call from
+        any thread; time reported after the solver finished is dropped.
+
+        Args:
+        - seconds (float): The time spent drawing.
+        """
+        self._rendering_times.put(seconds)
+
+    def latest(self) -> Optional[GenerationSnapshot]:
+        """Returns the snapshot of the most recent generation, or None if there is none yet.
+        """
+        return self._latest
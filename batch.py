@@ -0,0 +1,189 @@
+# ------------------------------- IMPORTS ---------------------------------------------------------#
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from LabyrinthGenerator import LabyrinthGenerator
+from Checkpoint import CheckpointWriter, resume
+from FrameRecorder import FFmpegSink, FrameRecorder, PNGSequenceSink
+from GALabyrinthSolver import GALabyrinthSolver
+from GenerationStats import PHASES
+
+# Runs many trials without a display. Only the generator, the solver, checkpoints and the offscreen frame
+# recorder are imported here, never pygame or matplotlib, so this works on machines without a screen or the
+# plotting library.
+
+# ------------------------------- METRICS --------------------------------------------------------- #
+
+FIELDS: List[str] = (["size", "seed", "population", "initial_mutation_rate", "generation", "best_fitness",
+                      "mean_fitness", "median_fitness", "mean_path_length", "diversity", "mutation_rate",
+                      "elitism_rate", "found_solution", "skipped_evaluations", "elapsed"] + [f"time_{phase}" for phase in PHASES])
+
+
+def load_labyrinth(size: int, seed: int, algorithm: str, maze_dir: Optional[str]) -> LabyrinthGenerator:
+    """Loads a labyrinth from the maze directory, generating and saving it there first if it is missing.
+
+    Args:
+    - size (int): The width and height of the labyrinth.
+    - seed (int): The seed of the labyrinth.
+    - algorithm (str): The algorithm used to generate the labyrinth.
+    - maze_dir (Optional[str]): The directory to reuse saved labyrinths from, or None to always generate.
+
+    Returns:
+    - LabyrinthGenerator: The finished labyrinth.
+    """
+    if maze_dir is None:
+        return LabyrinthGenerator(size, size, algorithm, seed=seed).generate()
+    path = os.path.join(maze_dir, f"{algorithm}-{size}-{seed}.laby")
+    if not os.path.exists(path):
+        os.makedirs(maze_dir, exist_ok=True)
+        LabyrinthGenerator(size, size, algorithm, seed=seed).generate().save(path)
+    return LabyrinthGenerator.load(path)
+
+
+def run_trial(size: int, seed: int, population: int, mutation_rate: float, generations: int,
+              rollout_backend: str, workers: Optional[int] = None, algorithm: str = "frontier",
+              maze_dir: Optional[str] = None, selection: str = "tournament", checkpoint_dir: Optional[str] = None,
+              checkpoint_interval: int = 10, frames_dir: Optional[str] = None, frame_stride: int = 10,
+              frame_format: str = "png", frame_scale: int = 1) -> Iterator[Dict]:
+    """Generates a labyrinth and solves it, yielding the metrics of every generation.
+
+    Args:
+    - size (int): The width and height of the labyrinth.
+    - seed (int): The seed for both the labyrinth and the genetic algorithm.
+    - population (int): The size of the population.
+    - mutation_rate (float): The initial probability of mutation.
+    - generations (int): The maximum number of generations.
+    - rollout_backend (str): The rollout backend of the solver.
+    - workers (Optional[int]): The number of worker processes, or None to evaluate in this process.
+    - algorithm (str): The algorithm used to generate the labyrinth.
+    - maze_dir (Optional[str]): The directory to reuse saved labyrinths from, or None to always generate.
+    - selection (str): The parent selection strategy of the solver.
+    - checkpoint_dir (Optional[str]): The directory to checkpoint the trial to. A trial with a checkpoint there
+      resumes from it instead of starting over.
+    - checkpoint_interval (int): The number of generations between two checkpoints.
+    - frames_dir (Optional[str]): The directory to record the trial to, or None to not record it.
+    - frame_stride (int): The number of generations between two recorded frames.
+    - frame_format (str): "png" for a directory of numbered PNG files per trial, "mp4" for a video per trial
+      encoded by ffmpeg.
+    - frame_scale (int): The width and height of every cell in pixels.
+
+    Yields:
+    - Dict: One row of metrics per generation, keyed by the names in FIELDS.
+    """
+    random.seed(seed)
+    labyrinth = load_labyrinth(size, seed, algorithm, maze_dir)
+    start = time.perf_counter()
+    trial_name = f"{algorithm}-{size}-{seed}-{population}-{mutation_rate}-{rollout_backend}-{selection}"
+    checkpoint_path = None if checkpoint_dir is None else os.path.join(checkpoint_dir, f"{trial_name}.ckpt")
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        solver = resume(checkpoint_path, labyrinth, workers)
+    else:
+        solver = GALabyrinthSolver(generations, population, mutation_rate, (1, 1),
+                                   (labyrinth.height - 2, labyrinth.width - 2), labyrinth,
+                                   rollout_backend=rollout_backend, workers=workers, selection=selection)
+    checkpoint_writer = None
+    if checkpoint_path is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        checkpoint_writer = CheckpointWriter(solver, checkpoint_path, checkpoint_interval)
+        solver.add_observer(checkpoint_writer)
+    frame_recorder = None
+    if frames_dir is not None:
+        if frame_format == "mp4":
+            os.makedirs(frames_dir, exist_ok=True)
+            sink = FFmpegSink(os.path.join(frames_dir, f"{trial_name}.mp4"))
+        else:
+            sink = PNGSequenceSink(os.path.join(frames_dir, trial_name))
+        frame_recorder = FrameRecorder(solver, sink, frame_stride, frame_scale)
+        solver.add_observer(frame_recorder)
+        frame_recorder.record()
+    try:
+        for stats in solver.run():
+            yield {"size": size, "seed": seed, "population": population, "initial_mutation_rate": mutation_rate,
+                   "generation": stats.generation, "best_fitness": stats.max_fitness,
+                   "mean_fitness": stats.mean_fitness, "median_fitness": stats.median_fitness,
+                   "mean_path_length": stats.mean_path_length, "diversity": stats.diversity,
+                   "mutation_rate": stats.mutation_rate, "elitism_rate": stats.elitism_rate,
+                   "found_solution": stats.found_solution, "skipped_evaluations": stats.skipped_evaluations,
+                   "elapsed": time.perf_counter() - start,
+                   **{f"time_{phase}": seconds for phase, seconds in stats.timings.items()}}
+    finally:
+        if checkpoint_writer is not None:
+            checkpoint_writer.close()
+        if frame_recorder is not None:
+            frame_recorder.close()
+        solver.close()
+
+
+def write_rows(rows: Iterator[Dict], output: TextIO, output_format: str) -> None:
+    """Writes metric rows to a stream as they are produced.
+
+    Args:
+    - rows (Iterator[Dict]): The rows to write.
+    - output (TextIO): The stream to write to.
+    - output_format (str): Either "jsonl" or "csv".
+    """
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row: Dict) -> None:
+            output.write(json.dumps(row) + "\n")
+    for row in rows:
+        write(row)
+        output.flush()
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Solve a matrix of labyrinths with the genetic algorithm and stream per-generation metrics.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[41], help="labyrinth widths and heights")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="random seeds")
+    parser.add_argument("--populations", type=int, nargs="+", default=[80], help="population sizes")
+    parser.add_argument("--mutation-rates", type=float, nargs="+", default=[0.04],
+                        help="initial mutation probabilities")
+    parser.add_argument("--algorithm", choices=LabyrinthGenerator.ALGORITHMS, default="frontier",
+                        help="labyrinth generation algorithm")
+    parser.add_argument("--maze-dir", help="directory to save generated labyrinths to and reuse them from")
+    parser.add_argument("--checkpoint-dir", help="directory to checkpoint trials to and resume them from")
+    parser.add_argument("--checkpoint-interval", type=int, default=10, help="generations between checkpoints")
+    parser.add_argument("--frames-dir", help="directory to record the generations of every trial to")
+    parser.add_argument("--frame-stride", type=int, default=10, help="generations between recorded frames")
+    parser.add_argument("--frame-format", choices=["png", "mp4"], default="png",
+                        help="record PNG files or an ffmpeg-encoded video per trial")
+    parser.add_argument("--frame-scale", type=int, default=1, help="pixels per labyrinth cell in recorded frames")
+    parser.add_argument("--generations", type=int, default=30, help="maximum number of generations per trial")
+    parser.add_argument("--backend", choices=GALabyrinthSolver.ROLLOUT_BACKENDS, default="python",
+                        help="rollout backend of the solver")
+    parser.add_argument("--selection", choices=GALabyrinthSolver.SELECTION_STRATEGIES, default="tournament",
+                        help="parent selection strategy of the solver")
+    parser.add_argument("--workers", type=int, default=None, help="evaluate on this many worker processes")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="output format")
+    parser.add_argument("--output", default="-", help="file to write the metrics to, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+# ------------------------------- BATCH RUN ------------------------------------------------------- #
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    trials = itertools.product(arguments.sizes, arguments.seeds, arguments.populations, arguments.mutation_rates)
+    metrics = (row for size, seed, population, mutation_rate in trials
+               for row in run_trial(size, seed, population, mutation_rate, arguments.generations,
+                                    arguments.backend, arguments.workers, arguments.algorithm,
+                                    arguments.maze_dir, arguments.selection, arguments.checkpoint_dir,
+                                    arguments.checkpoint_interval, arguments.frames_dir, arguments.frame_stride,
+                                    arguments.frame_format, arguments.frame_scale))
+    if arguments.output == "-":
+        write_rows(metrics, sys.stdout, arguments.format)
+    else:
+        with open(arguments.output, "w", newline="") as output_file:
+            write_rows(metrics, output_file, arguments.format)
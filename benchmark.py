@@ -0,0 +1,226 @@
+# ------------------------------- IMPORTS ---------------------------------------------------------#
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from LabyrinthGenerator import LabyrinthGenerator
+from GALabyrinthSolver import GALabyrinthSolver
+from Solution import Solution
+from helperFunctions import find_path
+
+# Seeded benchmarks for the expensive parts of the project. Every case is timed a few times without
+# memory tracing and then run once more under tracemalloc to record its peak memory. Results can be
+# saved as JSON and compared against a stored baseline.
+
+# ------------------------------- CASES ----------------------------------------------------------- #
+
+_labyrinths: Dict[int, LabyrinthGenerator] = {}
+
+
+def _labyrinth(size: int, seed: int) -> LabyrinthGenerator:
+    """Returns a finished labyrinth of the given size, generating it once per size.
+    """
+    if size not in _labyrinths:
+        _labyrinths[size] = LabyrinthGenerator(size, size, seed=seed).generate()
+    return _labyrinths[size]
+
+
+def _goal(labyrinth: LabyrinthGenerator):
+    return labyrinth.height - 2, labyrinth.width - 2
+
+
+def _solver(size: int, population: int, seed: int, generations: int = 30) -> GALabyrinthSolver:
+    labyrinth = _labyrinth(size, seed)
+    random.seed(seed)
+    return GALabyrinthSolver(generations, population, 0.04, (1, 1), _goal(labyrinth), labyrinth)
+
+
+def generation_case(size: int, population: int, seed: int) -> Callable[[], Callable[[], None]]:
+    def setup():
+        labyrinth = LabyrinthGenerator(size, size, seed=seed)
+
+        def run():
+            while labyrinth.get_frontier_cells():
+                labyrinth.work_one_step()
+        return run
+    return setup
+
+
+def generate_case(algorithm: str) -> Callable[[int, int, int], Callable[[], Callable[[], None]]]:
+    def case(size: int, population: int, seed: int) -> Callable[[], Callable[[], None]]:
+        def setup():
+            return LabyrinthGenerator(size, size, algorithm, seed=seed).generate
+        return setup
+    return case
+
+
+def find_path_case(bidirectional: bool) -> Callable[[int, int, int], Callable[[], Callable[[], None]]]:
+    def case(size: int, population: int, seed: int) -> Callable[[], Callable[[], None]]:
+        def setup():
+            labyrinth = _labyrinth(size, seed)
+            return lambda: find_path((1, 1), _goal(labyrinth), labyrinth.get_labyrinth(), bidirectional)
+        return setup
+    return case
+
+
+def evaluate_case(size: int, population: int, seed: int) -> Callable[[], Callable[[], None]]:
+    def setup():
+        solver = _solver(size, 1, seed)
+        solution = Solution(solver.context)
+        random.seed(seed)
+        return solution.evaluate
+    return setup
+
+
+def next_generation_case(size: int, population: int, seed: int) -> Callable[[], Callable[[], None]]:
+    def setup():
+        solver = _solver(size, population, seed)
+        random.seed(seed)
+        return solver.create_next_generation
+    return setup
+
+
+def full_run_case(size: int, population: int, seed: int) -> Callable[[], Callable[[], None]]:
+    def setup():
+        solver = _solver(size, population, seed)
+        random.seed(seed)
+
+        def run():
+            while solver.current_generation < solver.generation and not solver.found_solution:
+                solver.create_next_generation()
+        return run
+    return setup
+
+
+# Name of every case, the function building it, and whether it depends on the population size.
+CASES = {
+    "generation": (generation_case, False),
+    **{f"generate_{algorithm}": (generate_case(algorithm), False) for algorithm in LabyrinthGenerator.ALGORITHMS},
+    "find_path": (find_path_case(False), False),
+    "find_path_bidirectional": (find_path_case(True), False),
+    "evaluate": (evaluate_case, False),
+    "next_generation": (next_generation_case, True),
+    "full_run": (full_run_case, True),
+}
+
+# ------------------------------- MEASUREMENT ----------------------------------------------------- #
+
+
+def measure(setup: Callable[[], Callable[[], None]], repeats: int) -> Dict:
+    """Times a benchmark case and records its peak memory.
+
+    Args:
+    - setup (Callable[[], Callable[[], None]]): Prepares a fresh run of the case and returns it. Only the
+      returned function is timed.
+    - repeats (int): How many timed runs to make.
+
+    Returns:
+    - Dict: The best and mean time in seconds and the peak memory in bytes.
+    """
+    times = []
+    for _ in range(repeats):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    run = setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"best": min(times), "mean": sum(times) / len(times), "peak_bytes": peak}
+
+
+def run_benchmarks(cases: List[str], sizes: List[int], populations: List[int], repeats: int,
+                   seed: int) -> List[Dict]:
+    """Runs every requested case for every size, and every population size where it applies.
+
+    Returns:
+    - List[Dict]: One result per case, size and population size.
+    """
+    results = []
+    for size in sizes:
+        for name in cases:
+            build, uses_population = CASES[name]
+            for population in (populations if uses_population else [None]):
+                result = {"case": name, "size": size, "population": population}
+                result.update(measure(build(size, population, seed), repeats))
+                print(f"{name:>16} size={size:<5} population={population or '-':<6} "
+                      f"best={result['best']:.4f}s mean={result['mean']:.4f}s "
+                      f"peak={result['peak_bytes'] / 2 ** 20:.1f}MiB", file=sys.stderr)
+                results.append(result)
+        _labyrinths.pop(size, None)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> bool:
+    """Prints how every result compares to the baseline.
+
+    Args:
+    - results (List[Dict]): The results of this run.
+    - baseline (List[Dict]): The results of an earlier run.
+    - tolerance (float): How much slower, as a fraction, a case may get before it counts as a regression.
+
+    Returns:
+    - bool: True if no case got slower than the tolerance allows.
+    """
+    previous = {(r["case"], r["size"], r["population"]): r for r in baseline}
+    passed = True
+    for result in results:
+        old = previous.get((result["case"], result["size"], result["population"]))
+        if old is None:
+            continue
+        ratio = result["best"] / old["best"]
+        regressed = ratio > 1 + tolerance
+        passed = passed and not regressed
+        print(f"{result['case']:>16} size={result['size']:<5} population={result['population'] or '-':<6} "
+              f"{ratio:6.2f}x time {result['peak_bytes'] / max(1, old['peak_bytes']):6.2f}x memory"
+              f"{'  REGRESSION' if regressed else ''}")
+    return passed
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark labyrinth generation, pathfinding and the solver.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="cases to run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[41, 101, 501, 2001],
+                        help="labyrinth widths and heights")
+    parser.add_argument("--populations", type=int, nargs="+", default=[80, 1000, 10000],
+                        help="population sizes for the solver cases")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", help="file to save the results to as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed slowdown against the baseline before a case counts as a regression")
+    return parser.parse_args(argv)
+
+
+# ------------------------------- BENCHMARK RUN --------------------------------------------------- #
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "seed": arguments.seed,
+        "results": run_benchmarks(arguments.cases, arguments.sizes, arguments.populations, arguments.repeats,
+                                  arguments.seed),
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            if not compare(report["results"], json.load(baseline_file)["results"], arguments.tolerance):
+                sys.exit(1)
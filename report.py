@@ -0,0 +1,112 @@
+# ------------------------------- IMPORTS ---------------------------------------------------------#
+
+import json
+import sys
+from typing import Tuple
+
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.font_manager as fm
+from matplotlib.ticker import FormatStrFormatter
+
+# Plots the fitness of a finished run from the metrics file its StatsWriter wrote. This is the only module
+# that imports matplotlib; script.py imports it once the simulation window is closed, and it can also be run
+# on its own: python report.py metrics.jsonl
+
+FONT_FILE: str = 'Montserrat-SemiBold.ttf'
+
+# ------------------------------- METRICS --------------------------------------------------------- #
+
+
+def load_metrics(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads the generation numbers and highest fitness scores from a metrics file.
+
+    Args:
+    - path (str): A file of GenerationStats rows, one JSON object per line.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The generation numbers and the highest fitness of each generation.
+    """
+    with open(path) as metrics_file:
+        rows = [json.loads(line) for line in metrics_file if line.strip()]
+    generations = np.fromiter((row["generation"] for row in rows), dtype=float, count=len(rows))
+    fitness_scores = np.fromiter((row["max_fitness"] for row in rows), dtype=float, count=len(rows))
+    return generations, fitness_scores
+
+
+def linear_regression(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """Fits a straight line by ordinary least squares, in closed form.
+
+    Args:
+    - x (np.ndarray): The inputs.
+    - y (np.ndarray): The outputs.
+
+    Returns:
+    - Tuple[float, float]: The slope and the intercept of the line.
+    """
+    x_mean, y_mean = x.mean(), y.mean()
+    spread = ((x - x_mean) ** 2).sum()
+    slope = ((x - x_mean) * (y - y_mean)).sum() / spread if spread else 0.0
+    return float(slope), float(y_mean - slope * x_mean)
+
+# ------------------------------- PLOT ------------------------------------------------------------ #
+
+
+def show_report(path: str) -> None:
+    """Plots the highest fitness of every generation of a run together with its regression line.
+
+    Args:
+    - path (str): The metrics file of the run.
+    """
+    generations_numbers, fitness_scores = load_metrics(path)
+    if not len(generations_numbers):
+        return
+    font_prop = fm.FontProperties(fname=FONT_FILE)
+    slope, intercept = linear_regression(generations_numbers, fitness_scores)
+    regression = slope * generations_numbers + intercept
+
+    plt.style.use('seaborn-darkgrid')
+    fig, ax = plt.subplots(figsize=(12, 8))
+    plt.locator_params(axis="both", integer=True, tight=True)
+
+    ax.scatter(generations_numbers, fitness_scores, c='#ff2975',
+               s=50, zorder=5, label='Fitnesswerte')
+    ax.plot(generations_numbers, fitness_scores, c='#ff2975',
+            linewidth=4, label='Fitnesswerte im Laufe der Generationen')
+
+    ax.plot(generations_numbers, regression, '-', color='#ffd319', label='Lineare Regression', linewidth=6)
+
+    ax.fill_between(generations_numbers, fitness_scores, regression, color='#ffd319', alpha=0.2)
+
+    max_idx = np.argmax(fitness_scores)
+    min_idx = np.argmin(fitness_scores)
+    ax.annotate(f'Höchster Wert: {fitness_scores[max_idx]:.2f}', (generations_numbers[max_idx], fitness_scores[max_idx]),
+                textcoords="offset points", xytext=(0, 10), ha='center', fontsize=12, color='#333')
+    ax.annotate(f'Niedrigster Wert: {fitness_scores[min_idx]:.2f}', (generations_numbers[min_idx], fitness_scores[min_idx]),
+                textcoords="offset points", xytext=(0, -15), ha='center', fontsize=12, color='#333')
+
+    ax.grid(True, which="both", linestyle='--', linewidth=0.5)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.set_xlabel("Generationen", fontsize=22, fontproperties=font_prop)
+    ax.set_ylabel("Fitnesswerte", fontsize=22, fontproperties=font_prop)
+    ax.set_title("Auswertung der Simulation",
+                 fontsize=28, fontweight='bold', fontproperties=font_prop)
+
+    # Increase size of ticks on x and y-axis
+    ax.tick_params(axis='both', labelsize=16, length=10)
+    ax.set_yticks(np.arange(0, 1.25, 0.25))
+    y_format = FormatStrFormatter('%g')
+    ax.yaxis.set_major_formatter(y_format)
+    ax.legend(loc='upper left', frameon=True,
+              facecolor="white", fontsize=18, framealpha=0.8)
+
+    # Set limit for x-axis to start at 0
+    ax.set_xlim(0, generations_numbers[-1])
+    ax.set_ylim(0, 1.2)
+
+    plt.show()
+
+
+if __name__ == '__main__':
+    show_report(sys.argv[1] if len(sys.argv) > 1 else "metrics.jsonl")